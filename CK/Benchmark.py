@@ -0,0 +1,422 @@
+import argparse
+import contextlib
+import os
+import secrets
+import sys
+import time
+
+@contextlib.contextmanager
+def quiet():
+    """Tắt các dòng in của hàm sinh khóa trong lúc đo (file os.devnull được đóng khi ra khỏi khối)."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+def timeit(fn, ops: int) -> float:
+    """Thời gian trung bình (ms) của một lần gọi fn()."""
+    start = time.perf_counter()
+    for _ in range(ops):
+        fn()
+    return (time.perf_counter() - start) * 1000 / ops
+
+def bench_rsa_multiprime(bits: int, ops: int):
+    """So sánh độ trễ phép toán khóa bí mật RSA với 2, 3, 4 số nguyên tố."""
+    from RSA import generate_multiprime_rsa_keypair, rsa_crt_params, rsa_private_crt
+
+    print(f"--- RSA {bits}-bit: do tre phep toan khoa bi mat (CRT) ---")
+    print(f"{'so prime':>9} {'kich thuoc':>20} {'ms/op':>10} {'toc do':>8}")
+    baseline = None
+    for k in (2, 3, 4):
+        with quiet():
+            pub, priv = generate_multiprime_rsa_keypair(bits, k)
+        params = rsa_crt_params(priv)
+        values = [secrets.randbelow(pub["n"]) for _ in range(ops)]
+        it = iter(values)
+        ms = timeit(lambda: rsa_private_crt(next(it), params), ops)
+        baseline = baseline or ms
+        sizes = "/".join(str(r.bit_length()) for r in (params[1], params[2]) + tuple(o[0] for o in params[6]))
+        print(f"{k:>9} {sizes:>20} {ms:>10.2f} {baseline / ms:>7.2f}x")
+
+def bench_trace(ops: int):
+    """So sánh thời gian khi kênh trace tắt (mặc định) và bật (in ra /dev/null)."""
+    import Trace
+    from RSA import generate_rsa_keypair, rsa_decrypt_integer_crt
+    from ECC import generate_keypair, sign, verify
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "Ed25519"))
+    import key as ed_key
+    import sign as ed_sign
+
+    with quiet():
+        pub, priv = generate_rsa_keypair(1024)
+        d, Q = generate_keypair()
+        r, s = sign(b"benchmark", d)
+        _, a, A = ed_key.generate_keypair()
+        sig = ed_sign.sign(a, A, b"benchmark")
+    c = secrets.randbelow(pub["n"])
+    cases = [
+        ("RSA-2048 giai ma CRT", lambda: rsa_decrypt_integer_crt(c, priv)),
+        ("ECDSA P-192 verify", lambda: verify(b"benchmark", r, s, Q)),
+        ("Ed25519 verify", lambda: ed_sign.verify(A, b"benchmark", sig)),
+    ]
+    print("--- Chi phi trace: tat (mac dinh) va bat ---")
+    print(f"{'phep toan':<22} {'tat ms/op':>10} {'bat ms/op':>10} {'chenh lech':>10}")
+    for name, fn in cases:
+        Trace.configure("")
+        off = timeit(fn, ops)
+        Trace.configure("*")
+        with quiet():
+            on = timeit(fn, ops)
+        Trace.configure("")
+        print(f"{name:<22} {off:>10.3f} {on:>10.3f} {on / off:>9.2f}x")
+
+def bench_elgamal_fixed_base(bits: int, ops: int):
+    """So sánh mã hóa ElGamal thường và mã hóa dùng bảng cơ số cố định."""
+    from Elgamal import (generate_elgamal_keypair, elgamal_encrypt_message,
+                         elgamal_encrypt_precomputed, get_precomputation)
+
+    with quiet():
+        pub, _ = generate_elgamal_keypair(bits)
+    start = time.perf_counter()
+    get_precomputation(pub)
+    build = (time.perf_counter() - start) * 1000
+    plain = timeit(lambda: elgamal_encrypt_message(12345, pub), ops)
+    fast = timeit(lambda: elgamal_encrypt_precomputed(12345, pub), ops)
+    print(f"--- ElGamal {bits}-bit: ma hoa voi bang co so co dinh ---")
+    print(f"  dung bang (mot lan):  {build:10.2f} ms")
+    print(f"  pow() thuong:         {plain:10.2f} ms/op")
+    print(f"  tra bang:             {fast:10.2f} ms/op  ({plain / fast:.2f}x)")
+
+def bench_ecc_wnaf(ops: int):
+    """Số phép cộng/nhân đôi và thời gian của phép nhân điểm theo độ rộng cửa sổ wNAF."""
+    from ECC import N, Gx, Gy, wnaf, point_mul_binary, point_mul_wnaf
+
+    scalars = [secrets.randbelow(N - 1) + 1 for _ in range(ops)]
+    Q = point_mul_binary(secrets.randbelow(N - 1) + 1, (Gx, Gy))
+    print("--- ECC P-192: nhan diem co so thay doi ---")
+    print(f"{'w':>8} {'bang':>5} {'cong':>7} {'nhan doi':>9} {'ms/op':>8}")
+    adds = sum(bin(k).count("1") for k in scalars) / ops
+    dbls = sum(k.bit_length() for k in scalars) / ops
+    it = iter(scalars)
+    ms = timeit(lambda: point_mul_binary(next(it), Q), ops)
+    print(f"{'binary':>8} {0:>5} {adds:>7.1f} {dbls:>9.1f} {ms:>8.3f}")
+    for w in range(2, 8):
+        table = (1 << (w - 2)) - 1
+        # Phép cộng = chữ số khác 0 + dựng bảng bội lẻ (table lần cộng và 1 lần nhân đôi)
+        adds = sum(sum(1 for d in wnaf(k, w) if d) for k in scalars) / ops + table
+        dbls = sum(len(wnaf(k, w)) for k in scalars) / ops + (1 if table else 0)
+        it = iter(scalars)
+        ms = timeit(lambda: point_mul_wnaf(next(it), Q, w), ops)
+        print(f"{w:>8} {table + 1:>5} {adds:>7.1f} {dbls:>9.1f} {ms:>8.3f}")
+
+def bench_ecdsa_batch(items: int, keys: int, workers: int):
+    """Thông lượng xác minh ECDSA: từng chữ ký một so với verify_batch."""
+    from ECC import generate_keypair, sign, verify, verify_batch
+
+    pairs = [generate_keypair() for _ in range(keys)]
+    batch = []
+    for i in range(items):
+        d, Q = pairs[i % keys]
+        message = b"benchmark %d" % i
+        r, s = sign(message, d)
+        batch.append((message, r, s, Q))
+    start = time.perf_counter()
+    single = [verify(*item) for item in batch]
+    single_time = time.perf_counter() - start
+    start = time.perf_counter()
+    batched = verify_batch(batch, workers=workers)
+    batch_time = time.perf_counter() - start
+    assert single == batched
+    print(f"--- ECDSA P-192: xac minh {items} chu ky, {keys} khoa cong khai ---")
+    print(f"  verify tung chu ky:        {items / single_time:10.1f} chu ky/s")
+    print(f"  verify_batch (workers={workers}): {items / batch_time:10.1f} chu ky/s")
+
+def bench_ecc_curves(ops: int):
+    """Bảng thời gian sinh khóa/ký/xác minh ECDSA theo đường cong, và hàm reduce riêng so với % p."""
+    from ECC import CURVES, generate_keypair, sign, verify, g_table
+
+    curves = list(dict.fromkeys(CURVES.values()))
+    print("--- ECDSA theo duong cong (ms/op) ---")
+    print(f"{'duong cong':<11} {'bang G':>8} {'keygen':>8} {'sign':>8} {'verify':>8}")
+    for curve in curves:
+        start = time.perf_counter()
+        g_table(curve)
+        build = (time.perf_counter() - start) * 1000
+        keygen = timeit(lambda: generate_keypair(curve), ops)
+        d, Q = generate_keypair(curve)
+        sig = timeit(lambda: sign(b"benchmark", d, curve), ops)
+        r, s = sign(b"benchmark", d, curve)
+        ver = timeit(lambda: verify(b"benchmark", r, s, Q, curve), ops)
+        print(f"{curve.name:<11} {build:>8.1f} {keygen:>8.3f} {sig:>8.3f} {ver:>8.3f}")
+
+    print("\n--- Rut gon mod p cho tich hai phan tu truong (us/op) ---")
+    print(f"{'duong cong':<11} {'% p':>8} {'reduce':>8}")
+    for curve in curves:
+        p = curve.p
+        values = [secrets.randbelow(p) * secrets.randbelow(p) for _ in range(1000)]
+        assert all(curve.reduce(x) == x % p for x in values)
+        start = time.perf_counter()
+        for x in values:
+            x % p
+        generic = (time.perf_counter() - start) * 1e6 / len(values)
+        reduce = curve.reduce
+        start = time.perf_counter()
+        for x in values:
+            reduce(x)
+        special = (time.perf_counter() - start) * 1e6 / len(values)
+        print(f"{curve.name:<11} {generic:>8.3f} {special:>8.3f}")
+
+def bench_ecc_key_cache(keys: int, ops: int):
+    """Xác minh ECDSA với khóa công khai dạng bytes SEC1: cache lạnh (giải nén + dựng bảng) và cache nóng."""
+    from ECC import generate_keypair, sign, verify, encode_point, load_public_key
+
+    batch = []
+    for i in range(keys):
+        d, Q = generate_keypair()
+        message = b"benchmark %d" % i
+        batch.append((message, *sign(message, d), encode_point(Q)))
+    print(f"--- ECDSA P-192: xac minh voi {keys} khoa cong khai dang nen ---")
+    for label in ("cache lanh", "cache nong"):
+        if label == "cache nong":
+            # Nạp đầy cache một lượt (không đo) trước khi đo cache nóng
+            for item in batch:
+                verify(*item)
+        start = time.perf_counter()
+        for _ in range(ops):
+            if label == "cache lanh":
+                load_public_key.cache_clear()
+            for item in batch:
+                verify(*item)
+        ms = (time.perf_counter() - start) * 1000 / (ops * keys)
+        print(f"  {label}: {ms:8.3f} ms/chu ky")
+    print(f"  {load_public_key.cache_info()}")
+
+def bench_ecdh(curve_name: str, ops: int):
+    """Số lần bắt tay ECDH mỗi giây (một sinh khóa + một khóa chung + HKDF) theo cách nhân điểm."""
+    from ECC import get_curve, generate_keypair, point_add
+    from ECDH import ecdh_shared_x, hkdf_sha256
+
+    curve = get_curve(curve_name)
+
+    def affine_x(priv, pub):
+        # Cách cũ: double-and-add trên tọa độ affine, nghịch đảo ở mỗi bước
+        R = None
+        for bit in bin(priv)[2:]:
+            R = point_add(R, R, curve)
+            if bit == "1":
+                R = point_add(R, pub, curve)
+        return R[0]
+
+    peers = [generate_keypair(curve)[1] for _ in range(ops)]
+    methods = [
+        ("affine (cu)", lambda d, Q: affine_x(d, Q)),
+        ("ladder X:Z", lambda d, Q: ecdh_shared_x(d, Q, curve, ladder=True)),
+        ("ladder, chi x", lambda d, Q: ecdh_shared_x(d, Q[0], curve)),
+        ("wNAF Jacobian", lambda d, Q: ecdh_shared_x(d, Q, curve)),
+    ]
+    print(f"--- ECDH {curve.name}: bat tay moi giay (1 loi) ---")
+    baseline = None
+    for name, shared_x in methods:
+        it = iter(peers)
+
+        def handshake():
+            d, _ = generate_keypair(curve)
+            hkdf_sha256(shared_x(d, next(it)), 32, curve=curve)
+
+        ms = timeit(handshake, ops)
+        baseline = baseline or ms
+        print(f"  {name:<14} {1000 / ms:8.1f} /s  ({baseline / ms:.2f}x)")
+
+def bench_ecdsa_online(curve_name: str, burst: int, depth: int):
+    """Độ trễ ký ECDSA: sign() thường so với ECDSAOnlineSigner (pool (r, k^-1) nạp sẵn)."""
+    from ECC import get_curve, generate_keypair, sign, verify, ECDSAOnlineSigner
+
+    curve = get_curve(curve_name)
+    d, Q = generate_keypair(curve)
+    messages = [b"benchmark %d" % i for i in range(burst)]
+    it = iter(messages)
+    plain = timeit(lambda: sign(next(it), d, curve), burst)
+    signer = ECDSAOnlineSigner(d, curve, depth=depth).start()
+    while signer.stats()["ready"] < depth:
+        time.sleep(0.01)
+    it = iter(messages)
+    sigs = []
+    online = timeit(lambda: sigs.append(signer.sign(next(it))), burst)
+    signer.stop()
+    assert all(verify(m, r, s, Q, curve) for m, (r, s) in zip(messages, sigs))
+    stats = signer.stats()
+    print(f"--- ECDSA {curve.name}: ky {burst} thong diep lien tiep, pool depth={depth} ---")
+    print(f"  sign() thuong:    {plain * 1000:10.1f} us/chu ky")
+    print(f"  ky online:        {online * 1000:10.1f} us/chu ky  ({plain / online:.1f}x)")
+    print(f"  hit={stats['hits']} miss={stats['misses']} ti le hit={stats['hit_rate']:.2f}")
+
+def bench_ecc_many(lanes: int):
+    """Nhân điểm hàng loạt: ECC.point_mul từng làn so với ECCBatch.point_mul_many (NumPy)."""
+    from ECC import generate_keypair, point_mul, N
+    import ECCBatch
+
+    points = [generate_keypair()[1] for _ in range(lanes)]
+    scalars = [secrets.randbelow(N - 1) + 1 for _ in range(lanes)]
+    start = time.perf_counter()
+    expected = [point_mul(k, Q) for k, Q in zip(scalars, points)]
+    scalar_time = time.perf_counter() - start
+    start = time.perf_counter()
+    results = ECCBatch.point_mul_many(scalars, points)
+    batch_time = time.perf_counter() - start
+    assert results == expected
+    engine = "numpy" if ECCBatch.np is not None and lanes >= ECCBatch.MIN_LANES else "vo huong"
+    print(f"--- ECC P-192: nhan {lanes} diem bat ky ---")
+    print(f"  point_mul tung lan:       {scalar_time * 1000 / lanes:8.3f} ms/lan")
+    print(f"  point_mul_many ({engine}): {batch_time * 1000 / lanes:8.3f} ms/lan  ({scalar_time / batch_time:.2f}x)")
+
+def bench_ed25519(ops: int):
+    """Thời gian sinh khóa, ký và xác minh Ed25519 (ms/op)."""
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "Ed25519"))
+    import key as ed_key
+    import sign as ed_sign
+
+    _, a, A = ed_key.generate_keypair()
+    sig = ed_sign.sign(a, A, b"benchmark")
+    keygen = timeit(ed_key.generate_keypair, ops)
+    signing = timeit(lambda: ed_sign.sign(a, A, b"benchmark"), ops)
+    verify = timeit(lambda: ed_sign.verify(A, b"benchmark", sig), ops)
+    print("--- Ed25519 (ms/op) ---")
+    print(f"  sinh khoa: {keygen:8.3f}")
+    print(f"  ky:        {signing:8.3f}")
+    print(f"  xac minh:  {verify:8.3f}")
+
+def bench_ed25519_batch(size: int, keys: int):
+    """Xác minh Ed25519: từng chữ ký một so với verify_batch (tổ hợp tuyến tính ngẫu nhiên + Pippenger)."""
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "Ed25519"))
+    import key as ed_key
+    import sign as ed_sign
+
+    pairs = [ed_key.generate_keypair() for _ in range(keys)]
+    batch = []
+    for i in range(size):
+        _, a, A = pairs[i % keys]
+        message = b"benchmark %d" % i
+        batch.append((A, message, ed_sign.sign(a, A, message)))
+    start = time.perf_counter()
+    single = [ed_sign.verify(*item) for item in batch]
+    single_time = time.perf_counter() - start
+    start = time.perf_counter()
+    batched = ed_sign.verify_batch(batch)
+    batch_time = time.perf_counter() - start
+    assert single == batched
+    print(f"--- Ed25519: xac minh {size} chu ky ---")
+    print(f"  verify tung chu ky: {single_time * 1000 / size:8.3f} ms/chu ky")
+    print(f"  verify_batch:       {batch_time * 1000 / size:8.3f} ms/chu ky  ({single_time / batch_time:.2f}x)")
+
+def bench_ed25519ph(size_mb: int):
+    """Ký một file lớn: Ed25519 (đọc cả file vào bộ nhớ) so với Ed25519ph (băm SHA-512 theo luồng)."""
+    import tempfile
+    import tracemalloc
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "Ed25519"))
+    import key as ed_key
+    import sign as ed_sign
+    from utils import sha512_file
+
+    seed, a, A = ed_key.generate_keypair()
+    prefix = ed_key.nonce_prefix(seed)
+
+    def pure(path):
+        with open(path, "rb") as f:
+            return ed_sign.sign(a, A, f.read())
+
+    def prehashed(path):
+        return ed_sign.sign_prehashed(a, prefix, A, sha512_file(path))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "big.bin")
+        with open(path, "wb") as f:
+            for _ in range(size_mb):
+                f.write(os.urandom(1 << 20))
+        print(f"--- Ky file {size_mb} MB ---")
+        for name, fn in (("Ed25519 (doc ca file)", pure), ("Ed25519ph (theo luong)", prehashed)):
+            tracemalloc.start()
+            start = time.perf_counter()
+            fn(path)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"  {name:24s} {elapsed:7.3f} s  {size_mb / elapsed:8.1f} MB/s  bo nho dinh {peak / (1 << 20):8.1f} MB")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Do hieu nang cac thuat toan trong CK")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    b = sub.add_parser("rsa-multiprime")
+    b.add_argument("--bits", type=int, default=4096)
+    b.add_argument("--ops", type=int, default=50)
+
+    b = sub.add_parser("trace")
+    b.add_argument("--ops", type=int, default=20)
+
+    b = sub.add_parser("elgamal-fixedbase")
+    b.add_argument("--bits", type=int, default=2048)
+    b.add_argument("--ops", type=int, default=30)
+
+    b = sub.add_parser("ecc-wnaf")
+    b.add_argument("--ops", type=int, default=200)
+
+    b = sub.add_parser("ecdsa-batch")
+    b.add_argument("--items", type=int, default=2000)
+    b.add_argument("--keys", type=int, default=10)
+    b.add_argument("--workers", type=int, default=os.cpu_count())
+
+    b = sub.add_parser("ecc-curves")
+    b.add_argument("--ops", type=int, default=50)
+
+    b = sub.add_parser("ecc-keycache")
+    b.add_argument("--keys", type=int, default=100)
+    b.add_argument("--ops", type=int, default=5)
+
+    b = sub.add_parser("ecdh")
+    b.add_argument("--curve", default="secp256r1")
+    b.add_argument("--ops", type=int, default=50)
+
+    b = sub.add_parser("ecdsa-online")
+    b.add_argument("--curve", default="secp256r1")
+    b.add_argument("--burst", type=int, default=200)
+    b.add_argument("--depth", type=int, default=256)
+
+    b = sub.add_parser("ecc-many")
+    b.add_argument("--lanes", type=int, default=2000)
+
+    b = sub.add_parser("ed25519")
+    b.add_argument("--ops", type=int, default=50)
+
+    b = sub.add_parser("ed25519-batch")
+    b.add_argument("--size", type=int, default=256)
+    b.add_argument("--keys", type=int, default=16)
+
+    b = sub.add_parser("ed25519ph")
+    b.add_argument("--size-mb", type=int, default=256)
+
+    args = parser.parse_args()
+
+    if args.cmd == "rsa-multiprime":
+        bench_rsa_multiprime(args.bits, args.ops)
+    elif args.cmd == "trace":
+        bench_trace(args.ops)
+    elif args.cmd == "elgamal-fixedbase":
+        bench_elgamal_fixed_base(args.bits, args.ops)
+    elif args.cmd == "ecc-wnaf":
+        bench_ecc_wnaf(args.ops)
+    elif args.cmd == "ecdsa-batch":
+        bench_ecdsa_batch(args.items, args.keys, args.workers)
+    elif args.cmd == "ecc-curves":
+        bench_ecc_curves(args.ops)
+    elif args.cmd == "ecc-keycache":
+        bench_ecc_key_cache(args.keys, args.ops)
+    elif args.cmd == "ecdh":
+        bench_ecdh(args.curve, args.ops)
+    elif args.cmd == "ecdsa-online":
+        bench_ecdsa_online(args.curve, args.burst, args.depth)
+    elif args.cmd == "ecc-many":
+        bench_ecc_many(args.lanes)
+    elif args.cmd == "ed25519":
+        bench_ed25519(args.ops)
+    elif args.cmd == "ed25519-batch":
+        bench_ed25519_batch(args.size, args.keys)
+    elif args.cmd == "ed25519ph":
+        bench_ed25519ph(args.size_mb)
@@ -1,110 +1,884 @@
 # ecc_ecdsa.py
 
+import os
+import json
+import functools
 import secrets
 import hashlib
+import multiprocessing as mp
+from Trace import channel
+from PrecomputePool import PrecomputePool
 
-# --- Tham số SECP192R1 ---
-P  = int("FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFFFFFFFFFFFF", 16)
-A  = int("FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFFFFFFFFFFFC", 16)
-B  = int("64210519E59C80E70FA7E9AB72243049FEB8DEECC146B9B1", 16)
-Gx = int("188DA80EB03090F67CBF20EB43A18800F4FF0AFD82FF1012", 16)
-Gy = int("07192B95FFC8DA78631011ED6B24CDD573F977A11E794811", 16)
-N  = int("FFFFFFFFFFFFFFFFFFFFFFFF99DEF836146BC9B1B4D22831", 16)
-H  = 1
+trace = channel("ecc")
+
+# --- Đường cong ---
+MASK32 = (1 << 32) - 1
+
+def join_words(*words):
+    """Ghép các word 32-bit (word cao viết trước) thành một số nguyên."""
+    r = 0
+    for w in words:
+        r = (r << 32) | w
+    return r
+
+# Các hàm rút gọn nhanh x mod p cho số nguyên tố dạng đặc biệt, với 0 <= x < p^2
+# (tích của hai phần tử trường). Công thức Solinas cho các số nguyên tố NIST theo FIPS 186-4 phụ lục D.2.
+def reduce_p192(x):
+    """Rút gọn mod p = 2^192 - 2^64 - 1, dùng 2^192 = 2^64 + 1 (mod p)."""
+    for _ in range(2):
+        hi = x >> 192
+        x = (x & ((1 << 192) - 1)) + hi + (hi << 64)
+    while x >= P192:
+        x -= P192
+    return x
+
+def reduce_p256(x):
+    """Rút gọn Solinas mod p = 2^256 - 2^224 + 2^192 + 2^96 - 1 (word 32-bit c0..c15)."""
+    c0, c1, c2, c3, c4, c5, c6, c7, c8, c9, c10, c11, c12, c13, c14, c15 = \
+        [(x >> (32 * i)) & MASK32 for i in range(16)]
+    t = (x & ((1 << 256) - 1)) \
+        + 2 * join_words(c15, c14, c13, c12, c11, 0, 0, 0) \
+        + 2 * join_words(0, c15, c14, c13, c12, 0, 0, 0) \
+        + join_words(c15, c14, 0, 0, 0, c10, c9, c8) \
+        + join_words(c8, c13, c15, c14, c13, c11, c10, c9) \
+        - join_words(c10, c8, 0, 0, 0, c13, c12, c11) \
+        - join_words(c11, c9, 0, 0, c15, c14, c13, c12) \
+        - join_words(c12, 0, c10, c9, c8, c15, c14, c13) \
+        - join_words(c13, 0, c11, c10, c9, 0, c15, c14)
+    while t < 0:
+        t += P256
+    while t >= P256:
+        t -= P256
+    return t
+
+def reduce_p384(x):
+    """Rút gọn Solinas mod p = 2^384 - 2^128 - 2^96 + 2^32 - 1 (word 32-bit c0..c23)."""
+    c = [(x >> (32 * i)) & MASK32 for i in range(12, 24)]
+    c12, c13, c14, c15, c16, c17, c18, c19, c20, c21, c22, c23 = c
+    t = (x & ((1 << 384) - 1)) + (x >> 384) \
+        + 2 * join_words(0, 0, 0, 0, 0, c23, c22, c21, 0, 0, 0, 0) \
+        + join_words(c20, c19, c18, c17, c16, c15, c14, c13, c12, c23, c22, c21) \
+        + join_words(c19, c18, c17, c16, c15, c14, c13, c12, c20, 0, c23, 0) \
+        + join_words(0, 0, 0, 0, c23, c22, c21, c20, 0, 0, 0, 0) \
+        + join_words(0, 0, 0, 0, 0, 0, c23, c22, c21, 0, 0, c20) \
+        - join_words(c22, c21, c20, c19, c18, c17, c16, c15, c14, c13, c12, c23) \
+        - join_words(0, 0, 0, 0, 0, 0, 0, c23, c22, c21, c20, 0) \
+        - join_words(0, 0, 0, 0, 0, 0, 0, c23, c23, 0, 0, 0)
+    while t < 0:
+        t += P384
+    while t >= P384:
+        t -= P384
+    return t
+
+def reduce_secp256k1(x):
+    """Rút gọn mod p = 2^256 - 2^32 - 977, dùng 2^256 = 2^32 + 977 = 0x1000003D1 (mod p)."""
+    for _ in range(2):
+        hi = x >> 256
+        x = (x & ((1 << 256) - 1)) + hi * 0x1000003D1
+    if x >= PK1:
+        x -= PK1
+    return x
+
+
+class Curve:
+    """
+    Đường cong y^2 = x^3 + a*x + b trên F_p, điểm sinh G bậc n, cofactor h.
+    reduce: hàm rút gọn nhanh mod p theo dạng đặc biệt của p.
+    Lưu ý: trong CPython phép % trên số nguyên lớn chạy bằng C nên vẫn nhanh hơn các hàm reduce viết
+    bằng Python (xem "python Benchmark.py ecc-curves"), vì vậy các phép toán điểm bên dưới dùng % p.
+    """
+    def __init__(self, name, p, a, b, gx, gy, n, h=1, reduce=None):
+        self.name = name
+        self.p = p
+        self.a = a
+        self.b = b
+        self.G = (gx, gy)
+        self.n = n
+        self.h = h
+        self.reduce = reduce
+        self.byte_len = (p.bit_length() + 7) // 8
+
+    def __repr__(self):
+        return f"Curve({self.name})"
+
+
+P192 = 2**192 - 2**64 - 1
+P256 = 2**256 - 2**224 + 2**192 + 2**96 - 1
+P384 = 2**384 - 2**128 - 2**96 + 2**32 - 1
+PK1 = 2**256 - 2**32 - 977
+
+SECP192R1 = Curve(
+    "secp192r1", P192, P192 - 3,
+    int("64210519E59C80E70FA7E9AB72243049FEB8DEECC146B9B1", 16),
+    int("188DA80EB03090F67CBF20EB43A18800F4FF0AFD82FF1012", 16),
+    int("07192B95FFC8DA78631011ED6B24CDD573F977A11E794811", 16),
+    int("FFFFFFFFFFFFFFFFFFFFFFFF99DEF836146BC9B1B4D22831", 16),
+    reduce=reduce_p192)
+
+SECP256R1 = Curve(
+    "secp256r1", P256, P256 - 3,
+    int("5AC635D8AA3A93E7B3EBBD55769886BC651D06B0CC53B0F63BCE3C3E27D2604B", 16),
+    int("6B17D1F2E12C4247F8BCE6E563A440F277037D812DEB33A0F4A13945D898C296", 16),
+    int("4FE342E2FE1A7F9B8EE7EB4A7C0F9E162BCE33576B315ECECBB6406837BF51F5", 16),
+    int("FFFFFFFF00000000FFFFFFFFFFFFFFFFBCE6FAADA7179E84F3B9CAC2FC632551", 16),
+    reduce=reduce_p256)
+
+SECP384R1 = Curve(
+    "secp384r1", P384, P384 - 3,
+    int("B3312FA7E23EE7E4988E056BE3F82D19181D9C6EFE8141120314088F5013875A"
+        "C656398D8A2ED19D2A85C8EDD3EC2AEF", 16),
+    int("AA87CA22BE8B05378EB1C71EF320AD746E1D3B628BA79B9859F741E082542A38"
+        "5502F25DBF55296C3A545E3872760AB7", 16),
+    int("3617DE4A96262C6F5D9E98BF9292DC29F8F41DBD289A147CE9DA3113B5F0B8C0"
+        "0A60B1CE1D7E819D7A431D7C90EA0E5F", 16),
+    int("FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFC7634D81F4372DDF"
+        "581A0DB248B0A77AECEC196ACCC52973", 16),
+    reduce=reduce_p384)
+
+SECP256K1 = Curve(
+    "secp256k1", PK1, 0, 7,
+    int("79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798", 16),
+    int("483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8", 16),
+    int("FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141", 16),
+    reduce=reduce_secp256k1)
+
+CURVES = {c.name: c for c in (SECP192R1, SECP256R1, SECP384R1, SECP256K1)}
+# Tên thường gọi
+CURVES.update({"P-192": SECP192R1, "P-256": SECP256R1, "P-384": SECP384R1})
+
+def get_curve(name):
+    """Lấy đường cong theo tên (ví dụ "secp256r1", "P-256", "secp256k1")."""
+    try:
+        return CURVES[name]
+    except KeyError:
+        raise ValueError(f"Duong cong khong ho tro: {name}") from None
+
+# --- Tham số SECP192R1 (giữ lại cho các module cũ) ---
+P, A, B, N, H = SECP192R1.p, SECP192R1.a, SECP192R1.b, SECP192R1.n, SECP192R1.h
+Gx, Gy = SECP192R1.G
 
 # --- Hàm các phép toán elliptic curve trên trường hữu hạn ---
+# Các hàm điểm nhận tham số curve (mặc định SECP192R1).
 def inverse_mod(k, p):
-    """Tính nghịch đảo mod p (k^-1 mod p)."""
-    if k == 0:
+    """Tính nghịch đảo mod p (k^-1 mod p), dùng Euclid mở rộng của pow(k, -1, p)."""
+    if k % p == 0:
         raise ZeroDivisionError("Không thể tính nghịch đảo của 0")
-    return pow(k, p - 2, p)
+    return pow(k, -1, p)
 
-def point_add(P1, P2):
+def point_add(P1, P2, curve=SECP192R1):
     """Cộng hai điểm P1, P2 trên đường cong"""
     if P1 is None:
         return P2
     if P2 is None:
         return P1
+    p = curve.p
     x1, y1 = P1
     x2, y2 = P2
     if x1 == x2 and y1 != y2:
         return None
     if x1 == x2:
         # P1 == P2
-        m = (3 * x1 * x1 + A) * inverse_mod(2 * y1, P) % P
+        m = (3 * x1 * x1 + curve.a) * inverse_mod(2 * y1, p) % p
     else:
-        m = (y2 - y1) * inverse_mod(x2 - x1, P) % P
-    x3 = (m * m - x1 - x2) % P
-    y3 = (m * (x1 - x3) - y1) % P
+        m = (y2 - y1) * inverse_mod(x2 - x1, p) % p
+    x3 = (m * m - x1 - x2) % p
+    y3 = (m * (x1 - x3) - y1) % p
     return (x3, y3)
 
-def point_mul(k, P):
-    """Nhân điểm P với k (double-and-add)"""
-    R = None
-    addend = P
+# --- Tọa độ Jacobian ---
+# Điểm (X, Y, Z) biểu diễn điểm affine (X/Z^2, Y/Z^3); Z = 0 là điểm vô cực.
+# Cộng và nhân đôi không cần nghịch đảo, chỉ đổi về affine một lần ở cuối.
+JACOBIAN_INFINITY = (1, 1, 0)
+
+def to_jacobian(P1):
+    """Đổi điểm affine (hoặc None) sang tọa độ Jacobian."""
+    if P1 is None:
+        return JACOBIAN_INFINITY
+    return (P1[0], P1[1], 1)
+
+def from_jacobian(J, curve=SECP192R1):
+    """Đổi điểm Jacobian về affine (một phép nghịch đảo)."""
+    X, Y, Z = J
+    if Z == 0:
+        return None
+    p = curve.p
+    z_inv = inverse_mod(Z, p)
+    z_inv2 = z_inv * z_inv % p
+    return (X * z_inv2 % p, Y * z_inv2 * z_inv % p)
+
+def jacobian_double(J, curve=SECP192R1):
+    """Nhân đôi điểm Jacobian (công thức dbl-2001-b, tối ưu cho a = -3 và a = 0)."""
+    X1, Y1, Z1 = J
+    if Z1 == 0 or Y1 == 0:
+        return JACOBIAN_INFINITY
+    p = curve.p
+    a = curve.a
+    delta = Z1 * Z1 % p
+    gamma = Y1 * Y1 % p
+    beta = X1 * gamma % p
+    if a == p - 3:
+        # a = -3 (các đường cong NIST): 3X^2 + aZ^4 = 3(X - Z^2)(X + Z^2)
+        alpha = 3 * (X1 - delta) * (X1 + delta) % p
+    elif a == 0:
+        # a = 0 (secp256k1): bỏ hạng aZ^4
+        alpha = 3 * X1 * X1 % p
+    else:
+        alpha = (3 * X1 * X1 + a * delta * delta) % p
+    X3 = (alpha * alpha - 8 * beta) % p
+    Z3 = ((Y1 + Z1) * (Y1 + Z1) - gamma - delta) % p
+    Y3 = (alpha * (4 * beta - X3) - 8 * gamma * gamma) % p
+    return (X3, Y3, Z3)
+
+def jacobian_add_mixed(J, Q, curve=SECP192R1):
+    """Cộng điểm Jacobian J với điểm affine Q (mixed addition, Z2 = 1)."""
+    X1, Y1, Z1 = J
+    if Q is None:
+        return J
+    x2, y2 = Q
+    if Z1 == 0:
+        return (x2, y2, 1)
+    p = curve.p
+    Z1Z1 = Z1 * Z1 % p
+    U2 = x2 * Z1Z1 % p
+    S2 = y2 * Z1 * Z1Z1 % p
+    H = (U2 - X1) % p
+    r = (S2 - Y1) % p
+    if H == 0:
+        # Cùng hoành độ: J == Q thì nhân đôi, J == -Q thì ra điểm vô cực
+        return jacobian_double(J, curve) if r == 0 else JACOBIAN_INFINITY
+    HH = H * H % p
+    HHH = H * HH % p
+    V = X1 * HH % p
+    X3 = (r * r - HHH - 2 * V) % p
+    Y3 = (r * (V - X3) - Y1 * HHH) % p
+    Z3 = Z1 * H % p
+    return (X3, Y3, Z3)
+
+def jacobian_add(J1, J2, curve=SECP192R1):
+    """Cộng hai điểm Jacobian (công thức add-1998-cmo-2)."""
+    X1, Y1, Z1 = J1
+    X2, Y2, Z2 = J2
+    if Z1 == 0:
+        return J2
+    if Z2 == 0:
+        return J1
+    p = curve.p
+    Z1Z1 = Z1 * Z1 % p
+    Z2Z2 = Z2 * Z2 % p
+    U1 = X1 * Z2Z2 % p
+    U2 = X2 * Z1Z1 % p
+    S1 = Y1 * Z2 * Z2Z2 % p
+    S2 = Y2 * Z1 * Z1Z1 % p
+    H = (U2 - U1) % p
+    r = (S2 - S1) % p
+    if H == 0:
+        return jacobian_double(J1, curve) if r == 0 else JACOBIAN_INFINITY
+    HH = H * H % p
+    HHH = H * HH % p
+    V = U1 * HH % p
+    X3 = (r * r - HHH - 2 * V) % p
+    Y3 = (r * (V - X3) - S1 * HHH) % p
+    Z3 = Z1 * Z2 * H % p
+    return (X3, Y3, Z3)
+
+def point_neg(P1, curve=SECP192R1):
+    """Điểm đối -P1."""
+    if P1 is None:
+        return None
+    return (P1[0], (-P1[1]) % curve.p)
+
+def batch_inverse(values, m):
+    """Nghịch đảo đồng thời nhiều số mod m (mẹo Montgomery): chỉ một phép nghịch đảo thật."""
+    prefix = []
+    acc = 1
+    for v in values:
+        prefix.append(acc)
+        acc = acc * v % m
+    acc_inv = inverse_mod(acc, m)
+    result = [0] * len(values)
+    for i in range(len(values) - 1, -1, -1):
+        result[i] = acc_inv * prefix[i] % m
+        acc_inv = acc_inv * values[i] % m
+    return result
+
+def batch_to_affine(points, curve=SECP192R1):
+    """Đổi nhiều điểm Jacobian (khác vô cực) về affine với một phép nghịch đảo."""
+    p = curve.p
+    z_invs = batch_inverse([J[2] for J in points], p)
+    result = []
+    for (X, Y, _), z_inv in zip(points, z_invs):
+        z_inv2 = z_inv * z_inv % p
+        result.append((X * z_inv2 % p, Y * z_inv2 * z_inv % p))
+    return result
+
+def point_mul_binary(k, P1, curve=SECP192R1):
+    """Nhân điểm P1 với k (double-and-add trên tọa độ Jacobian, đổi về affine ở cuối)"""
+    if P1 is None or k == 0:
+        return None
+    R = JACOBIAN_INFINITY
+    for bit in bin(k)[2:]:
+        R = jacobian_double(R, curve)
+        if bit == "1":
+            R = jacobian_add_mixed(R, P1, curve)
+    return from_jacobian(R, curve)
+
+# --- wNAF (width-w Non-Adjacent Form) ---
+# Độ rộng cửa sổ mặc định cho phép nhân điểm với cơ số thay đổi
+WNAF_WINDOW = 4
+
+def wnaf(k, w):
+    """Biểu diễn k dạng wNAF: các chữ số lẻ |d| < 2^(w-1) hoặc 0, từ bit thấp đến bit cao."""
+    digits = []
+    half = 1 << (w - 1)
+    full = 1 << w
     while k:
         if k & 1:
-            R = point_add(R, addend)
-        addend = point_add(addend, addend)
+            d = k & (full - 1)
+            if d >= half:
+                d -= full
+            k -= d
+        else:
+            d = 0
+        digits.append(d)
         k >>= 1
-    return R
+    return digits
+
+def odd_multiples(P1, w, curve=SECP192R1):
+    """Bảng các bội lẻ affine [P, 3P, 5P, ..., (2^(w-1) - 1)P] dùng cho wNAF."""
+    count = 1 << (w - 2)
+    if count == 1:
+        return [P1]
+    two_p = from_jacobian(jacobian_double(to_jacobian(P1), curve), curve)
+    multiples = [to_jacobian(P1)]
+    for _ in range(count - 1):
+        multiples.append(jacobian_add_mixed(multiples[-1], two_p, curve))
+    return batch_to_affine(multiples, curve)
+
+def point_mul_wnaf(k, P1, w=WNAF_WINDOW, table=None, curve=SECP192R1):
+    """Nhân điểm P1 với k bằng wNAF độ rộng w (table: bảng bội lẻ của P1 nếu đã có)."""
+    if P1 is None or k == 0:
+        return None
+    if k < 0:
+        return point_neg(point_mul_wnaf(-k, P1, w, table, curve), curve)
+    if table is None:
+        table = odd_multiples(P1, w, curve)
+    R = JACOBIAN_INFINITY
+    for d in reversed(wnaf(k, w)):
+        R = jacobian_double(R, curve)
+        if d:
+            R = jacobian_add_digit(R, d, table, curve)
+    return from_jacobian(R, curve)
+
+def jacobian_add_digit(R, d, table, curve=SECP192R1):
+    """Cộng chữ số wNAF d (lẻ, khác 0) của một điểm vào R, dùng bảng bội lẻ của điểm đó."""
+    if d > 0:
+        return jacobian_add_mixed(R, table[d >> 1], curve)
+    return jacobian_add_mixed(R, point_neg(table[(-d) >> 1], curve), curve)
+
+# --- Bảng cơ số cố định cho G ---
+# rows[i][j - 1] = j * 2^(w*i) * G (affine), nên k*G chỉ cần tối đa ceil(bits/w) phép cộng, không nhân đôi.
+# Mỗi đường cong có bảng riêng. Đặt biến môi trường CK_ECC_GTABLE_CACHE=<file> để lưu bảng ra đĩa và
+# nạp lại ở các tiến trình sau; "{curve}" trong tên file được thay bằng tên đường cong
+# (không có thì tên đường cong được chèn trước phần mở rộng).
+G_TABLE_WINDOW = 4
+G_TABLE_CACHE = os.environ.get("CK_ECC_GTABLE_CACHE")
+_g_tables = {}
+
+def g_table_cache_path(curve=SECP192R1):
+    """Đường dẫn file cache bảng G của đường cong (None nếu không bật cache)."""
+    if not G_TABLE_CACHE:
+        return None
+    if "{curve}" in G_TABLE_CACHE:
+        return G_TABLE_CACHE.replace("{curve}", curve.name)
+    root, ext = os.path.splitext(G_TABLE_CACHE)
+    return f"{root}.{curve.name}{ext}"
+
+def build_g_table(w=G_TABLE_WINDOW, curve=SECP192R1):
+    """Dựng bảng cơ số cố định cho G (một phép nghịch đảo cho toàn bảng)."""
+    rows = []
+    base = to_jacobian(curve.G)
+    base_affine = curve.G
+    for _ in range((curve.n.bit_length() + w - 1) // w):
+        row = [base]
+        for _ in range((1 << w) - 2):
+            row.append(jacobian_add_mixed(row[-1], base_affine, curve))
+        rows.append(row)
+        # Cơ số hàng kế tiếp: 2^w * base = (2^w - 1) * base + base
+        base = jacobian_add_mixed(row[-1], base_affine, curve)
+        base_affine = from_jacobian(base, curve)
+    flat = batch_to_affine([J for row in rows for J in row], curve)
+    size = (1 << w) - 1
+    return [flat[i:i + size] for i in range(0, len(flat), size)]
+
+def save_g_table(path, rows, w=G_TABLE_WINDOW, curve=SECP192R1):
+    """Lưu bảng của G ra file JSON (ghi qua file tạm)."""
+    data = {"curve": curve.name, "window": w,
+            "rows": [[[hex(x), hex(y)] for x, y in row] for row in rows]}
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+def is_affine_sum(P1, Q, R, curve=SECP192R1):
+    """
+    Kiểm tra P1 + Q = R (ba điểm affine đã nằm trên đường cong) không cần nghịch đảo:
+    P1, Q và -R thẳng hàng (P1 = Q: -R nằm trên tiếp tuyến tại P1), với -R khác P1 và Q.
+    """
+    (x1, y1), (x2, y2), (x3, y3) = P1, Q, R
+    p = curve.p
+    if x3 == x1 or x3 == x2:
+        return False
+    if P1 == Q:
+        return (3 * x1 * x1 + curve.a) * (x3 - x1) % p == 2 * y1 * (-y3 - y1) % p
+    if x1 == x2:
+        return False
+    return (y2 - y1) * (x3 - x1) % p == (-y3 - y1) * (x2 - x1) % p
+
+def g_table_valid(rows, w=G_TABLE_WINDOW, curve=SECP192R1):
+    """
+    Kiểm tra đầy đủ bảng của G nạp từ file: đủ số hàng, mỗi hàng 2^w - 1 điểm trên đường cong,
+    rows[0][0] = G, rows[i][j] = rows[i][j-1] + rows[i][0] và rows[i+1][0] = rows[i][-1] + rows[i][0].
+    Mỗi điểm chỉ tốn vài phép nhân (is_affine_sum), rẻ hơn nhiều so với dựng lại bảng.
+    """
+    size = (1 << w) - 1
+    if len(rows) != (curve.n.bit_length() + w - 1) // w or any(len(row) != size for row in rows):
+        return False
+    if rows[0][0] != curve.G or not all(is_on_curve(P1, curve) for row in rows for P1 in row):
+        return False
+    for i, row in enumerate(rows):
+        base = row[0]
+        for j in range(1, size):
+            if not is_affine_sum(row[j - 1], base, row[j], curve):
+                return False
+        if i + 1 < len(rows) and not is_affine_sum(row[-1], base, rows[i + 1][0], curve):
+            return False
+    return True
+
+def load_g_table(path, w=G_TABLE_WINDOW, curve=SECP192R1):
+    """Nạp bảng của G từ file; trả về None (để dựng lại) nếu file không có, hỏng hoặc không khớp tham số."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        if data["curve"] != curve.name or data["window"] != w:
+            return None
+        rows = [[(int(x, 16), int(y, 16)) for x, y in row] for row in data["rows"]]
+        if not g_table_valid(rows, w, curve):
+            return None
+    except Exception:
+        return None
+    return rows
+
+def g_table(curve=SECP192R1):
+    """Lấy bảng của G: dựng ở lần dùng đầu tiên (hoặc nạp từ file cache nếu có)."""
+    rows = _g_tables.get(curve.name)
+    if rows is None:
+        path = g_table_cache_path(curve)
+        rows = load_g_table(path, curve=curve) if path else None
+        if rows is None:
+            rows = build_g_table(curve=curve)
+            if path:
+                save_g_table(path, rows, curve=curve)
+        _g_tables[curve.name] = rows
+    return rows
+
+def point_mul_base(k, curve=SECP192R1):
+    """Tính k*G bằng bảng cơ số cố định: chỉ cộng, không nhân đôi."""
+    k %= curve.n
+    if k == 0:
+        return None
+    mask = (1 << G_TABLE_WINDOW) - 1
+    R = JACOBIAN_INFINITY
+    for row in g_table(curve):
+        if not k:
+            break
+        digit = k & mask
+        if digit:
+            R = jacobian_add_mixed(R, row[digit - 1], curve)
+        k >>= G_TABLE_WINDOW
+    return from_jacobian(R, curve)
+
+# --- Nhân hai vô hướng đồng thời (Straus / Shamir) ---
+# Bảng bội lẻ của G cho wNAF được dựng một lần, nên có thể dùng cửa sổ rộng hơn
+G_WNAF_WINDOW = 7
+_g_odd_multiples = {}
+
+def g_odd_multiples(curve=SECP192R1):
+    """Bảng bội lẻ của G cho wNAF độ rộng G_WNAF_WINDOW (dựng ở lần dùng đầu tiên)."""
+    table = _g_odd_multiples.get(curve.name)
+    if table is None:
+        table = _g_odd_multiples[curve.name] = odd_multiples(curve.G, G_WNAF_WINDOW, curve)
+    return table
+
+def point_mul_double(u1, P1, u2, P2, w1=WNAF_WINDOW, w2=WNAF_WINDOW, table1=None, table2=None,
+                     curve=SECP192R1):
+    """
+    Tính u1*P1 + u2*P2 bằng một chuỗi nhân đôi chung (Straus/Shamir, chữ số wNAF cho cả hai).
+    Nếu P1 (hoặc P2) là G thì dùng bảng bội lẻ cố định của G.
+    """
+    terms = []
+    for u, Pt, w, table in ((u1, P1, w1, table1), (u2, P2, w2, table2)):
+        u %= curve.n
+        if Pt is None or u == 0:
+            continue
+        if table is None:
+            if Pt == curve.G:
+                w, table = G_WNAF_WINDOW, g_odd_multiples(curve)
+            else:
+                table = odd_multiples(Pt, w, curve)
+        terms.append((wnaf(u, w), table))
+    if not terms:
+        return None
+    if len(terms) == 1:
+        terms.append(([], None))
+    (digits1, table1), (digits2, table2) = terms
+    # Bổ sung chữ số 0 để hai dãy wNAF cùng độ dài, rồi duyệt từ bit cao xuống
+    length = max(len(digits1), len(digits2))
+    digits1 = digits1 + [0] * (length - len(digits1))
+    digits2 = digits2 + [0] * (length - len(digits2))
+    R = JACOBIAN_INFINITY
+    for d1, d2 in zip(reversed(digits1), reversed(digits2)):
+        R = jacobian_double(R, curve)
+        if d1:
+            R = jacobian_add_digit(R, d1, table1, curve)
+        if d2:
+            R = jacobian_add_digit(R, d2, table2, curve)
+    return from_jacobian(R, curve)
+
+def point_mul(k, P1, curve=SECP192R1):
+    """Nhân điểm P1 với k: dùng bảng cố định khi P1 là G, ngược lại dùng wNAF trên tọa độ Jacobian"""
+    if P1 == curve.G:
+        return point_mul_base(k, curve)
+    return point_mul_wnaf(k, P1, curve=curve)
+
+# --- Montgomery ladder chỉ dùng tọa độ x ---
+# Điểm được biểu diễn bằng (X : Z) với x = X/Z (công thức Brier-Joye / Izu-Takagi cho đường cong Weierstrass).
+# Mỗi bit đều thực hiện đúng một phép cộng sai phân và một phép nhân đôi, chỉ nghịch đảo một lần ở cuối.
+def ladder_double(X, Z, curve=SECP192R1):
+    """Nhân đôi (X : Z): X' = (X^2 - aZ^2)^2 - 8bXZ^3, Z' = 4Z(X^3 + aXZ^2 + bZ^3)."""
+    p, a, b = curve.p, curve.a, curve.b
+    XX = X * X % p
+    ZZ = Z * Z % p
+    aZZ = a * ZZ % p
+    t = XX - aZZ
+    X2 = (t * t - 8 * b * X * Z * ZZ) % p
+    Z2 = 4 * Z * (X * (XX + aZZ) + b * ZZ * Z) % p
+    return X2, Z2
+
+def ladder_add(X1, Z1, X2, Z2, x, curve=SECP192R1):
+    """Cộng sai phân (X1 : Z1) + (X2 : Z2), biết hiệu của hai điểm có hoành độ affine x."""
+    p, a, b = curve.p, curve.a, curve.b
+    U = X1 * Z2 % p
+    V = X2 * Z1 % p
+    ZZ = Z1 * Z2 % p
+    d = (U - V) % p
+    Z3 = d * d % p
+    X3 = (2 * (U + V) * (X1 * X2 + a * ZZ) + 4 * b * ZZ * ZZ - x * Z3) % p
+    return X3, Z3
+
+def point_mul_x(k, x, curve=SECP192R1):
+    """
+    Hoành độ của k*P khi chỉ biết hoành độ x của P (Montgomery ladder).
+    Kiểm tra x^3 + ax + b là số chính phương mod p (x thuộc đường cong, không thuộc twist); sai -> ValueError.
+    Trả về None nếu k*P là điểm vô cực.
+    """
+    p = curve.p
+    if not 0 <= x < p or sqrt_mod(x * x * x + curve.a * x + curve.b, p) is None:
+        raise ValueError("Hoanh do khong thuoc duong cong")
+    k %= curve.n
+    if k == 0:
+        return None
+    X0, Z0 = x, 1
+    X1, Z1 = ladder_double(x, 1, curve)
+    for bit in bin(k)[3:]:
+        if bit == "1":
+            X0, Z0 = ladder_add(X0, Z0, X1, Z1, x, curve)
+            X1, Z1 = ladder_double(X1, Z1, curve)
+        else:
+            X1, Z1 = ladder_add(X0, Z0, X1, Z1, x, curve)
+            X0, Z0 = ladder_double(X0, Z0, curve)
+    if Z0 == 0:
+        return None
+    return X0 * inverse_mod(Z0, p) % p
+
+# --- Mã hóa điểm SEC1 ---
+# 0x04 || x || y (không nén), 0x02/0x03 || x (nén, byte đầu cho biết tính chẵn lẻ của y), 0x00: điểm vô cực.
+def sqrt_mod(a, p):
+    """Căn bậc hai mod p nguyên tố; trả về None nếu a không phải số chính phương mod p."""
+    a %= p
+    if a == 0:
+        return 0
+    if pow(a, (p - 1) // 2, p) != 1:
+        return None
+    if p % 4 == 3:
+        # Cả bốn đường cong có sẵn đều có p = 3 (mod 4): căn = a^((p+1)/4)
+        return pow(a, (p + 1) // 4, p)
+    # Tonelli-Shanks: p - 1 = q * 2^s với q lẻ
+    q, s = p - 1, 0
+    while q % 2 == 0:
+        q //= 2
+        s += 1
+    z = 2
+    while pow(z, (p - 1) // 2, p) != p - 1:
+        z += 1
+    m, c, t, r = s, pow(z, q, p), pow(a, q, p), pow(a, (q + 1) // 2, p)
+    while t != 1:
+        i, t2 = 0, t
+        while t2 != 1:
+            t2 = t2 * t2 % p
+            i += 1
+        b = pow(c, 1 << (m - i - 1), p)
+        m, c = i, b * b % p
+        t, r = t * c % p, r * b % p
+    return r
+
+def is_on_curve(P1, curve=SECP192R1):
+    """Kiểm tra P1 là điểm hợp lệ (tọa độ trong [0, p) và thỏa phương trình; cofactor = 1 nên không cần kiểm tra bậc)."""
+    if P1 is None:
+        return False
+    x, y = P1
+    p = curve.p
+    if not (0 <= x < p and 0 <= y < p):
+        return False
+    return (y * y - (x * x * x + curve.a * x + curve.b)) % p == 0
+
+def encode_point(P1, compressed=True, curve=SECP192R1):
+    """Mã hóa điểm theo SEC1 (mặc định dạng nén)."""
+    if P1 is None:
+        return b"\x00"
+    x, y = P1
+    size = curve.byte_len
+    if compressed:
+        return bytes([2 + (y & 1)]) + x.to_bytes(size, "big")
+    return b"\x04" + x.to_bytes(size, "big") + y.to_bytes(size, "big")
+
+def decode_point(data, curve=SECP192R1):
+    """Giải mã điểm SEC1 (nén hoặc không nén) và kiểm tra điểm nằm trên đường cong. Sai -> ValueError."""
+    size = curve.byte_len
+    data = bytes(data)
+    if len(data) == 1 + size and data[0] in (2, 3):
+        x = int.from_bytes(data[1:], "big")
+        if x >= curve.p:
+            raise ValueError("Diem khong hop le: x >= p")
+        y = sqrt_mod(x * x * x + curve.a * x + curve.b, curve.p)
+        if y is None:
+            raise ValueError("Diem khong hop le: khong co y tuong ung voi x")
+        if (y & 1) != data[0] - 2:
+            y = curve.p - y
+        P1 = (x, y)
+    elif len(data) == 1 + 2 * size and data[0] == 4:
+        P1 = (int.from_bytes(data[1:1 + size], "big"), int.from_bytes(data[1 + size:], "big"))
+    else:
+        raise ValueError(f"Ma hoa diem khong hop le ({len(data)} byte) cho {curve.name}")
+    if not is_on_curve(P1, curve):
+        raise ValueError("Diem khong nam tren duong cong")
+    return P1
+
+# Khóa công khai đã giải mã được giữ trong cache LRU (theo bytes và đường cong), kèm bảng bội lẻ,
+# nên xác minh lặp lại với cùng khóa không phải giải nén và dựng bảng lại.
+PUBLIC_KEY_CACHE_SIZE = 4096
+PUBLIC_KEY_WINDOW = 5
+
+@functools.lru_cache(maxsize=PUBLIC_KEY_CACHE_SIZE)
+def load_public_key(data, curve=SECP192R1):
+    """Giải mã khóa công khai SEC1, trả về (Q, bảng bội lẻ của Q cho wNAF độ rộng PUBLIC_KEY_WINDOW)."""
+    Q = decode_point(data, curve)
+    return Q, odd_multiples(Q, PUBLIC_KEY_WINDOW, curve)
+
+def public_key_table(Q, curve=SECP192R1):
+    """Trả về (Q, w, bảng): Q dạng bytes thì lấy qua cache, dạng tuple thì dựng bảng mới."""
+    if isinstance(Q, (bytes, bytearray)):
+        Q, table = load_public_key(bytes(Q), curve)
+        return Q, PUBLIC_KEY_WINDOW, table
+    return Q, WNAF_WINDOW, odd_multiples(Q, WNAF_WINDOW, curve)
+
+def encode_signature(r, s, curve=SECP192R1):
+    """Chữ ký dạng r || s, mỗi phần dài bằng số byte của n."""
+    size = (curve.n.bit_length() + 7) // 8
+    return r.to_bytes(size, "big") + s.to_bytes(size, "big")
+
+def decode_signature(data, curve=SECP192R1):
+    """Tách chữ ký r || s thành (r, s)."""
+    size = (curve.n.bit_length() + 7) // 8
+    if len(data) != 2 * size:
+        raise ValueError("Do dai chu ky khong hop le")
+    return int.from_bytes(data[:size], "big"), int.from_bytes(data[size:], "big")
 
 # --- Hàm sinh khóa ---
-def generate_keypair():
+def generate_keypair(curve=SECP192R1):
     """Sinh cặp khóa ECC (d, Q)"""
-    d = secrets.randbelow(N - 1) + 1
-    Q = point_mul(d, (Gx, Gy))
+    d = secrets.randbelow(curve.n - 1) + 1
+    Q = point_mul(d, curve.G, curve)
     return d, Q
 
+def hash_to_int(message: bytes, curve=SECP192R1):
+    """
+    e = SHA-256(message), giữ lại số bit bằng độ dài của n (bit trái nhất) như chuẩn ECDSA.
+    Riêng SECP192R1 giữ cách băm cũ (toàn bộ 256 bit, rút gọn mod n khi ký) để các chữ ký
+    P-192 đã tạo trước đây vẫn xác minh được.
+    """
+    digest = hashlib.sha256(message).digest()
+    e = int.from_bytes(digest, 'big')
+    if curve.name == SECP192R1.name:
+        return e
+    excess = len(digest) * 8 - curve.n.bit_length()
+    return e >> excess if excess > 0 else e
+
 # --- Ký ECDSA ---
-def sign(message: bytes, d: int):
+def sign(message: bytes, d: int, curve=SECP192R1):
     """Ký thông điệp bằng khóa bí mật d"""
-    e = int.from_bytes(hashlib.sha256(message).digest(), 'big')
+    N = curve.n
+    e = hash_to_int(message, curve)
     while True:
         k = secrets.randbelow(N - 1) + 1
-        R = point_mul(k, (Gx, Gy))
+        R = point_mul(k, curve.G, curve)
         r = R[0] % N
         if r == 0:
             continue
         s = (inverse_mod(k, N) * (e + d * r)) % N
         if s != 0:
             break
-    print("\n--- Ký ECDSA ---")
-    print(f"k = {k}")
-    print(f"R = ({R[0]}, {R[1]})")
-    print(f"r = {r}")
-    print(f"s = {s}")
+    trace("\n--- Ký ECDSA ---")
+    trace("k = {}", k)
+    trace("R = ({}, {})", R[0], R[1])
+    trace("r = {}", r)
+    trace("s = {}", s)
     return r, s
 
+# --- Ký ECDSA offline/online ---
+def ecdsa_nonce(curve=SECP192R1):
+    """Phần offline của chữ ký (không phụ thuộc thông điệp): chọn k, trả về (r = (k*G).x mod n, k^-1 mod n)."""
+    N = curve.n
+    while True:
+        k = secrets.randbelow(N - 1) + 1
+        r = point_mul_base(k, curve)[0] % N
+        if r != 0:
+            return r, inverse_mod(k, N)
+
+class ECDSAOnlineSigner:
+    """
+    Ký ECDSA offline/online với khóa bí mật d.
+    Offline: thread nền tính sẵn các cặp (r, k^-1) vào pool giới hạn.
+    Online: sign() chỉ còn một lần băm và vài phép nhân mod n; mỗi cặp chỉ dùng một lần
+    (dùng lại k làm lộ khóa bí mật). Pool rỗng thì tính trực tiếp.
+    """
+    def __init__(self, d: int, curve=SECP192R1, depth: int = 64, low_water: int = None):
+        self.d = d
+        self.curve = curve
+        self.pool = PrecomputePool(lambda: ecdsa_nonce(curve), depth, low_water)
+
+    def start(self):
+        self.pool.start()
+        return self
+
+    def stop(self):
+        self.pool.stop()
+
+    def sign(self, message: bytes) -> tuple:
+        N = self.curve.n
+        e = hash_to_int(message, self.curve)
+        while True:
+            r, k_inv = self.pool.take()
+            s = k_inv * (e + self.d * r) % N
+            if s != 0:
+                break
+        trace("\n--- Ký ECDSA (online) ---")
+        trace("r = {}", r)
+        trace("s = {}", s)
+        return r, s
+
+    def stats(self) -> dict:
+        return self.pool.stats()
+
 # --- Xác minh ECDSA ---
-def verify(message: bytes, r: int, s: int, Q):
-    """Xác minh chữ ký (r, s) với khóa công khai Q"""
+def verify(message: bytes, r: int, s: int, Q, curve=SECP192R1):
+    """Xác minh chữ ký (r, s) với khóa công khai Q (điểm, hoặc bytes SEC1 - khi đó dùng cache khóa)"""
+    N = curve.n
     if not (1 <= r < N) or not (1 <= s < N):
         return False
-    e = int.from_bytes(hashlib.sha256(message).digest(), 'big')
+    if isinstance(Q, (bytes, bytearray)):
+        try:
+            Q, table = load_public_key(bytes(Q), curve)
+        except ValueError:
+            return False
+        w2 = PUBLIC_KEY_WINDOW
+    else:
+        table, w2 = None, WNAF_WINDOW
+    e = hash_to_int(message, curve)
     w = inverse_mod(s, N)
     u1 = (e * w) % N
     u2 = (r * w) % N
-    X = point_add(point_mul(u1, (Gx, Gy)), point_mul(u2, Q))
+    X = point_mul_double(u1, curve.G, u2, Q, w2=w2, table2=table, curve=curve)
     if X is None:
         return False
     x1, y1 = X
-    print("\n--- Xác minh ECDSA ---")
-    print(f"w = {w}")
-    print(f"u1 = {u1}")
-    print(f"u2 = {u2}")
-    print(f"X = ({x1}, {y1})")
-    print(f"x1 mod N = {x1 % N}")
+    trace("\n--- Xác minh ECDSA ---")
+    trace("w = {}", w)
+    trace("u1 = {}", u1)
+    trace("u2 = {}", u2)
+    trace("X = ({}, {})", x1, y1)
+    trace("x1 mod N = {}", x1 % N)
     return (x1 % N) == r
 
+# --- Xác minh ECDSA theo lô ---
+def verify_group(job):
+    """Xác minh một nhóm chữ ký cùng khóa công khai Q: bảng bội lẻ của Q chỉ dựng một lần."""
+    curve, Q, entries = job
+    try:
+        Q, w, table = public_key_table(Q, curve)
+    except ValueError:
+        return [(index, False) for index, _, _, _ in entries]
+    results = []
+    for index, r, u1, u2 in entries:
+        X = point_mul_double(u1, curve.G, u2, Q, w2=w, table2=table, curve=curve)
+        results.append((index, X is not None and X[0] % curve.n == r))
+    return results
+
+def verify_batch(items, workers=1, chunk=256, curve=SECP192R1):
+    """
+    Xác minh nhiều chữ ký (message, r, s, Q); trả về một giá trị bool cho mỗi phần tử.
+    Q có thể là điểm hoặc bytes SEC1 (dùng cache khóa công khai).
+    - Băm toàn bộ thông điệp trước, nghịch đảo mọi s mod N bằng một phép nghịch đảo (mẹo Montgomery).
+    - Gom theo khóa công khai để dùng lại bảng bội lẻ của Q.
+    - workers > 1: chia các nhóm (tối đa chunk chữ ký) cho một pool tiến trình.
+    """
+    N = curve.n
+    results = [False] * len(items)
+    valid = []
+    for index, (message, r, s, Q) in enumerate(items):
+        if Q is not None and 1 <= r < N and 1 <= s < N:
+            valid.append((index, hash_to_int(message, curve), r, s, Q))
+    s_invs = batch_inverse([s for _, _, _, s, _ in valid], N)
+
+    groups = {}
+    for (index, e, r, s, Q), w in zip(valid, s_invs):
+        key = bytes(Q) if isinstance(Q, (bytes, bytearray)) else tuple(Q)
+        groups.setdefault(key, []).append((index, r, e * w % N, r * w % N))
+    jobs = [(curve, Q, entries[i:i + chunk]) for Q, entries in groups.items()
+            for i in range(0, len(entries), chunk)]
+
+    if workers is None:
+        workers = os.cpu_count()
+    if workers > 1 and len(jobs) > 1:
+        with mp.Pool(workers) as pool:
+            done = pool.imap_unordered(verify_group, jobs)
+            for group in done:
+                for index, ok in group:
+                    results[index] = ok
+    else:
+        for job in jobs:
+            for index, ok in verify_group(job):
+                results[index] = ok
+    trace.info("verify_batch: {} chu ky, {} khoa cong khai, {} hop le", len(items), len(groups), sum(results))
+    return results
+
 # --- Hàm hiển thị tham số ---
-def print_parameters(d=None, Q=None):
-    print("\n=== Tham số đường cong SECP192R1 ===")
-    print(f"P = {P}")
-    print(f"A = {A}")
-    print(f"B = {B}")
-    print(f"G = ({Gx}, {Gy})")
-    print(f"N = {N}, H = {H}")
+def print_parameters(d=None, Q=None, curve=SECP192R1):
+    print(f"\n=== Tham số đường cong {curve.name.upper()} ===")
+    print(f"P = {curve.p}")
+    print(f"A = {curve.a}")
+    print(f"B = {curve.b}")
+    print(f"G = ({curve.G[0]}, {curve.G[1]})")
+    print(f"N = {curve.n}, H = {curve.h}")
     if d and Q:
         print("\n=== Khóa ECC ===")
         print(f"d = {d}")
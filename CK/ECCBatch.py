@@ -0,0 +1,179 @@
+# Nhân điểm hàng loạt trên SECP192R1 bằng NumPy (tùy chọn).
+# Mỗi phần tử trường là 8 limb 24-bit; N phần tử được xếp thành mảng int64 kích thước (8, N),
+# nên mỗi phép toán NumPy xử lý cùng lúc cả N "làn" (lane). Không có NumPy thì dùng ECC.point_mul.
+# Các limb được chuẩn hóa lười: có thể âm hoặc hơi vượt 24 bit, chỉ đổi về số nguyên mod p ở cuối.
+
+from ECC import SECP192R1, point_mul, is_on_curve, batch_inverse
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+LIMB_BITS = 24
+LIMBS = 8
+LIMB_MASK = (1 << LIMB_BITS) - 1
+# Dưới số làn này, chi phí gọi NumPy lớn hơn lợi ích: dùng engine vô hướng
+MIN_LANES = 512
+
+def to_limbs(values):
+    """Danh sách số nguyên (0 <= v < 2^192) -> mảng limb (8, N)."""
+    data = b"".join(v.to_bytes(3 * LIMBS, "little") for v in values)
+    b = np.frombuffer(data, dtype=np.uint8).reshape(len(values), LIMBS, 3).astype(np.int64)
+    return np.ascontiguousarray((b[..., 0] | (b[..., 1] << 8) | (b[..., 2] << 16)).T)
+
+def from_limbs(arr, p):
+    """Mảng limb (8, N), có thể chưa chuẩn hóa (limb âm hoặc > 24 bit) -> danh sách số nguyên mod p."""
+    result = []
+    for limbs in arr.T.tolist():
+        v = 0
+        for limb in reversed(limbs):
+            v = (v << LIMB_BITS) + limb
+        result.append(v % p)
+    return result
+
+def fe_carry(r):
+    """
+    Lan truyền carry song song (3 lượt) trên mảng limb, tại chỗ.
+    Carry ra khỏi limb 7 (trọng số 2^192) được cộng lại vào limb 0 và limb 2 (nhân 2^16)
+    vì 2^192 = 2^64 + 1 = 2^16 * 2^48 + 1 (mod p).
+    Sau 3 lượt mỗi limb xấp xỉ trong [-2^17, 2^24 + 2^17]: đủ nhỏ để nhân tiếp mà không tràn int64.
+    """
+    for _ in range(3):
+        c = r >> LIMB_BITS
+        r &= LIMB_MASK
+        r[1:] += c[:-1]
+        top = c[-1]
+        r[0] += top
+        r[2] += top << 16
+    return r
+
+def fe_mul(a, b):
+    """Nhân hai mảng phần tử trường theo từng làn, rút gọn Solinas mod p = 2^192 - 2^64 - 1."""
+    acc = np.zeros((2 * LIMBS, a.shape[1]), dtype=np.int64)
+    for i in range(LIMBS):
+        acc[i:i + LIMBS] += a[i] * b
+    # Một lượt carry để các limb cao đủ nhỏ trước khi nhân với 2^16
+    c = acc >> LIMB_BITS
+    acc &= LIMB_MASK
+    acc[1:] += c[:-1]
+    # acc = lo + hi * 2^192, với 2^192 = 1 + 2^64 và 2^64 = 2^16 * 2^48 (dịch 2 limb, nhân 2^16)
+    hi = acc[LIMBS:]
+    r = acc[:LIMBS] + hi
+    r[2:] += hi[:LIMBS - 2] << 16
+    # Hai limb cao của hi * 2^64 lại vượt 2^192: gấp thêm một lần (2^16 * 2^192 = 2^16 + 2^80)
+    r[0:2] += hi[LIMBS - 2:] << 16
+    r[3:5] += hi[LIMBS - 2:] << 8
+    return fe_carry(r)
+
+def fe_sqr(a):
+    return fe_mul(a, a)
+
+# --- Co-Z Montgomery ladder (Goundar, Joye, Miyaji, Rivain, Venelli) ---
+# Hai điểm R0, R1 dùng chung tọa độ Z: (X, Y) biểu diễn (X/Z^2, Y/Z^3). Z được nhân dần
+# theo từng bước; nếu một làn gặp trường hợp đặc biệt (hai điểm cùng hoành độ) thì Z của làn đó
+# thành 0 và làn được tính lại bằng engine vô hướng.
+def co_z_add(X1, Y1, X2, Y2):
+    """XYcZ-ADD: trả về (P + Q, P cập nhật theo Z mới, hệ số nhân Z = X1 - X2)."""
+    d = X1 - X2
+    C = fe_sqr(d)
+    W1 = fe_mul(X1, C)
+    W2 = fe_mul(X2, C)
+    dy = Y1 - Y2
+    A1 = fe_mul(Y1, W1 - W2)
+    X3 = fe_sqr(dy) - W1 - W2
+    Y3 = fe_mul(dy, W1 - X3) - A1
+    return X3, Y3, W1, A1, d
+
+def co_z_add_conjugate(X1, Y1, X2, Y2):
+    """XYcZ-ADDC: trả về (P + Q, P - Q, hệ số nhân Z = X1 - X2)."""
+    d = X1 - X2
+    C = fe_sqr(d)
+    W1 = fe_mul(X1, C)
+    W2 = fe_mul(X2, C)
+    dy = Y1 - Y2
+    sy = Y1 + Y2
+    A1 = fe_mul(Y1, W1 - W2)
+    X3 = fe_sqr(dy) - W1 - W2
+    Y3 = fe_mul(dy, W1 - X3) - A1
+    X4 = fe_sqr(sy) - W1 - W2
+    Y4 = fe_mul(sy, W1 - X4) - A1
+    return X3, Y3, X4, Y4, d
+
+def co_z_initial_double(x, y, a):
+    """XYcZ-IDBL: từ điểm affine P, trả về (2P, P) dùng chung Z = 2y. a là hệ số nhỏ (a = -3 với SECP192R1)."""
+    B = fe_sqr(x)
+    E = fe_sqr(y)
+    L = fe_sqr(E)
+    M = 3 * B
+    M[0] += a
+    S = 4 * fe_mul(x, E)
+    X2 = fe_carry(fe_sqr(M) - 2 * S)
+    Y2 = fe_carry(fe_mul(M, S - X2) - 8 * L)
+    return X2, Y2, fe_carry(S), fe_carry(8 * L), fe_carry(2 * y)
+
+def ladder_lanes(bits, x, y, a):
+    """
+    Montgomery ladder trên mọi làn. bits: mảng bool (số bit, N), bit cao nhất của mọi làn bằng 1.
+    Trả về (X, Y, Z) của R0 = k*P theo tọa độ Jacobian.
+    """
+    X1, Y1, X0, Y0, Z = co_z_initial_double(x, y, a)
+    for b in bits[1:]:
+        # (R_{1-b}, R_b) = ADDC(R_b, R_{1-b}), rồi (R_b, R_{1-b}) = ADD(R_{1-b}, R_b)
+        Xb, Yb = np.where(b, X1, X0), np.where(b, Y1, Y0)
+        Xn, Yn = np.where(b, X0, X1), np.where(b, Y0, Y1)
+        Xs, Ys, Xd, Yd, d1 = co_z_add_conjugate(Xb, Yb, Xn, Yn)
+        Xb, Yb, Xn, Yn, d2 = co_z_add(Xs, Ys, Xd, Yd)
+        Z = fe_mul(Z, fe_mul(d1, d2))
+        X0, Y0 = np.where(b, Xn, Xb), np.where(b, Yn, Yb)
+        X1, Y1 = np.where(b, Xb, Xn), np.where(b, Yb, Yn)
+    return X0, Y0, Z
+
+def point_mul_many(scalars, points, curve=SECP192R1):
+    """
+    Tính [k_i * P_i] cho nhiều cặp (k_i, P_i) cùng lúc; kết quả giống hệt ECC.point_mul.
+    Dùng NumPy khi có và khi số làn >= MIN_LANES (chỉ hỗ trợ SECP192R1), ngược lại dùng engine vô hướng.
+    Các làn đặc biệt (k = 0 mod n, P = None hoặc không nằm trên đường cong, trường hợp đặc biệt
+    trong ladder) được tính lại bằng ECC.point_mul. Làn có P = G cũng dùng ECC.point_mul vì bảng
+    cơ số cố định của G nhanh hơn ladder (sinh khóa hàng loạt không cần engine này).
+    """
+    scalars = list(scalars)
+    points = list(points)
+    if len(scalars) != len(points):
+        raise ValueError("So vo huong va so diem phai bang nhau")
+    if np is None or curve is not SECP192R1 or len(points) < MIN_LANES:
+        return [point_mul(k, P1, curve) for k, P1 in zip(scalars, points)]
+
+    p, n = curve.p, curve.n
+    length = n.bit_length()
+    lanes, padded = [], []
+    for i, (k, P1) in enumerate(zip(scalars, points)):
+        k %= n
+        if k and P1 is not None and P1 != curve.G and is_on_curve(P1, curve):
+            # k' = k + n hoặc k + 2n luôn có đúng length + 1 bit và k'P = kP
+            k += n
+            if k.bit_length() == length:
+                k += n
+            lanes.append(i)
+            padded.append(k)
+    results = [None] * len(points)
+    done = set()
+    if lanes:
+        size = (length + 8) // 8
+        data = np.frombuffer(b"".join(k.to_bytes(size, "big") for k in padded), dtype=np.uint8)
+        bits = np.unpackbits(data.reshape(len(padded), size), axis=1)[:, -(length + 1):].T.astype(bool)
+        x = to_limbs([points[i][0] for i in lanes])
+        y = to_limbs([points[i][1] for i in lanes])
+        X, Y, Z = ladder_lanes(bits, x, y, curve.a - p)
+        Zs = from_limbs(Z, p)
+        good = [j for j, z in enumerate(Zs) if z]
+        z_invs = batch_inverse([Zs[j] for j in good], p)
+        X, Y = from_limbs(X, p), from_limbs(Y, p)
+        for j, z_inv in zip(good, z_invs):
+            z_inv2 = z_inv * z_inv % p
+            results[lanes[j]] = (X[j] * z_inv2 % p, Y[j] * z_inv2 * z_inv % p)
+            done.add(lanes[j])
+    for i, (k, P1) in enumerate(zip(scalars, points)):
+        if i not in done:
+            results[i] = point_mul(k, P1, curve)
+    return results
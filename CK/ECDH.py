@@ -1,35 +1,84 @@
 # demo_ecdh_verbose.py
-from ECC import generate_keypair, point_mul
+from ECC import (generate_keypair, point_mul, point_mul_x, is_on_curve, load_public_key,
+                 get_curve, SECP192R1)
+import sys
+import hmac
 import hashlib
 
-def ecdh_shared_secret(priv, pub):
+def ecdh_shared_secret(priv, pub, curve=SECP192R1):
     """Tính khóa chung ECDH: K = d * Q"""
-    return point_mul(priv, pub)
-
-def hkdf_sha256(key_material, length=16, info=b"ecdh-demo"):
-    """Hàm HKDF đơn giản dùng SHA-256"""
-    # Bước 1: extract
-    prk = hashlib.sha256(key_material.to_bytes(48, 'big')).digest()
-    # Bước 2: expand
-    okm = hashlib.sha256(prk + info + b'\x01').digest()
+    return point_mul(priv, pub, curve)
+
+def ecdh_shared_x(priv, pub, curve=SECP192R1, ladder=False):
+    """
+    Hoành độ của khóa chung d * Q (chỉ phần này được dùng làm bí mật chung).
+    pub: điểm (x, y), bytes SEC1 (giải mã qua cache khóa) hoặc chỉ hoành độ x (số nguyên).
+    Khi chỉ có x, hoặc ladder=True, dùng Montgomery ladder (X : Z): mỗi bit cùng một chuỗi phép toán.
+    Ngược lại dùng point_mul (wNAF trên tọa độ Jacobian), nhanh hơn ladder trong Python.
+    """
+    if isinstance(pub, (bytes, bytearray)):
+        pub, _ = load_public_key(bytes(pub), curve)
+    elif isinstance(pub, int):
+        x = point_mul_x(priv, pub, curve)
+        if x is None:
+            raise ValueError("Khoa chung la diem vo cuc")
+        return x
+    elif not is_on_curve(pub, curve):
+        raise ValueError("Khoa cong khai khong nam tren duong cong")
+    if ladder:
+        x = point_mul_x(priv, pub[0], curve)
+    else:
+        K = point_mul(priv, pub, curve)
+        x = K[0] if K is not None else None
+    if x is None:
+        raise ValueError("Khoa chung la diem vo cuc")
+    return x
+
+# --- HKDF (RFC 5869) với HMAC-SHA256 ---
+def hkdf_extract(salt: bytes, ikm: bytes) -> bytes:
+    """PRK = HMAC(salt, IKM); salt rỗng thay bằng 32 byte 0."""
+    return hmac.new(salt or bytes(32), ikm, hashlib.sha256).digest()
+
+def hkdf_expand(prk: bytes, info: bytes, length: int) -> bytes:
+    """OKM = T(1) || T(2) || ... với T(i) = HMAC(PRK, T(i-1) || info || i), tối đa 255 * 32 byte."""
+    if length > 255 * 32:
+        raise ValueError("Do dai khoa HKDF toi da 8160 byte")
+    okm = b""
+    block = b""
+    counter = 1
+    while len(okm) < length:
+        block = hmac.new(prk, block + info + bytes([counter]), hashlib.sha256).digest()
+        okm += block
+        counter += 1
     return okm[:length]
 
-def demo_ecdh():
+def hkdf_sha256(key_material, length=16, info=b"ecdh-demo", salt=b"", curve=SECP192R1):
+    """HKDF-SHA256; key_material là bytes hoặc hoành độ (số nguyên, mã hóa đúng độ dài phần tử trường)."""
+    if isinstance(key_material, int):
+        key_material = key_material.to_bytes(curve.byte_len, 'big')
+    return hkdf_expand(hkdf_extract(salt, key_material), info, length)
+
+def derive_shared_key(priv, pub, length=32, info=b"ecdh-demo", salt=b"", curve=SECP192R1):
+    """Khóa phiên từ ECDH: HKDF trên hoành độ của d * Q."""
+    return hkdf_sha256(ecdh_shared_x(priv, pub, curve), length, info, salt, curve)
+
+def demo_ecdh(curve=SECP192R1):
+    print(f"Duong cong: {curve.name}\n")
     # Sinh cặp khóa Alice
-    alice_priv, alice_pub = generate_keypair()
+    alice_priv, alice_pub = generate_keypair(curve)
     print("Alice:")
     print(f"  Khóa riêng d = {alice_priv}")
     print(f"  Khóa công khai Q = ({alice_pub[0]}, {alice_pub[1]})\n")
 
     # Sinh cặp khóa Bob
-    bob_priv, bob_pub = generate_keypair()
+    bob_priv, bob_pub = generate_keypair(curve)
     print("Bob:")
     print(f"  Khóa riêng d = {bob_priv}")
     print(f"  Khóa công khai Q = ({bob_pub[0]}, {bob_pub[1]})\n")
 
     # Tính khóa chung
-    alice_shared_point = ecdh_shared_secret(alice_priv, bob_pub)
-    bob_shared_point   = ecdh_shared_secret(bob_priv, alice_pub)
+    alice_shared_point = ecdh_shared_secret(alice_priv, bob_pub, curve)
+    bob_shared_point   = ecdh_shared_secret(bob_priv, alice_pub, curve)
 
     print("Khóa chung Alice tính được:")
     print(f"  X = {alice_shared_point[0]}")
@@ -44,8 +93,8 @@ def demo_ecdh():
     bob_shared_int   = bob_shared_point[0]
 
     # Derive key từ shared secret
-    alice_key = hkdf_sha256(alice_shared_int)
-    bob_key   = hkdf_sha256(bob_shared_int)
+    alice_key = hkdf_sha256(alice_shared_int, curve=curve)
+    bob_key   = hkdf_sha256(bob_shared_int, curve=curve)
 
     print("Khóa cuối sau HKDF:")
     print(f"  Alice key = {alice_key.hex()}")
@@ -53,4 +102,5 @@ def demo_ecdh():
     print("Khóa giống nhau:", alice_key == bob_key)
 
 if __name__ == "__main__":
-    demo_ecdh()
+    # Tên đường cong tùy chọn: python ECDH.py secp256r1 (mặc định secp192r1)
+    demo_ecdh(get_curve(sys.argv[1]) if len(sys.argv) > 1 else SECP192R1)
@@ -1,5 +1,6 @@
 from key import generate_keypair, export_private_seed, export_public_key
-from sign import sign, verify
+from sign import sign, verify, verify_batch
+from Trace import enable_demo_tracing
 
 def main_demo():
     print("[*] Step 1: Generate keypair")
@@ -20,5 +21,17 @@ def main_demo():
     valid_tampered = verify(A, tampered, sig)
     print("Signature valid for tampered message?", valid_tampered)
 
+    print("\n[*] Step 5: Batch verification with malformed public keys")
+    # Keys that are not exactly 32 bytes must give False for their item only,
+    # in a small group (checked one by one) and in a large one (batch equation)
+    bad_keys = [pub_bytes[:31], b"", pub_bytes + b"\x00"]
+    for size in (len(bad_keys) + 1, 8):
+        items = [(key, msg, sig) for key in bad_keys]
+        items += [(pub_bytes, msg, sig)] * (size - len(bad_keys))
+        results = verify_batch(items)
+        expected = [False] * len(bad_keys) + [True] * (size - len(bad_keys))
+        print(f"Batch of {size}: {results} -> as expected? {results == expected}")
+
 if __name__ == "__main__":
+    enable_demo_tracing()
     main_demo()
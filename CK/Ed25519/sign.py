@@ -1,39 +1,128 @@
-from utils import sha512, scalar_mult, encode_point, decode_point, ed_add, B, l
-
-def log(msg, value):
-    print(f"[LOG] {msg}: {value}")
+import secrets
+from utils import (sha512, scalar_mult_base, encode_point, encode_points, decode_point, double_scalar_mult,
+                   matches_encoding, multi_scalar_mult, is_identity, ed_add, ed_neg, dom2, log, l)
 
 def sign(a, A, message_bytes):
-    log("Message bytes", message_bytes.hex())
-    r = int.from_bytes(sha512(a.to_bytes(32,"little") + message_bytes), "little") % l
+    return sign_with_domain(a, A, a.to_bytes(32,"little"), message_bytes)
+
+def sign_with_domain(a, A, nonce_key, message_bytes, dom=b""):
+    # r = H(dom || nonce_key || M), k = H(dom || R || A || M); dom is empty for plain Ed25519
+    log("Message bytes", message_bytes)
+    r = int.from_bytes(sha512(dom + nonce_key + message_bytes), "little") % l
     log("Nonce r", r)
-    R = scalar_mult(B, r)
+    R = scalar_mult_base(r)
     log("Point R", R)
     R_enc = encode_point(R)
-    log("Encoded R", R_enc.hex())
+    log("Encoded R", R_enc)
 
-    k = int.from_bytes(sha512(R_enc + encode_point(A) + message_bytes), "little") % l
+    k = int.from_bytes(sha512(dom + R_enc + encode_point(A) + message_bytes), "little") % l
     log("Challenge k", k)
     S = (r + k*a) % l
     log("Scalar S", S)
     signature = R_enc + S.to_bytes(32,"little")
-    log("Final signature", signature.hex())
+    log("Final signature", signature)
     return signature
 
 def verify(A, message_bytes, signature):
+    return verify_with_domain(A, message_bytes, signature)
+
+def verify_with_domain(A, message_bytes, signature, dom=b""):
+    if len(signature) != 64:
+        return False
     R_enc = signature[:32]
     S = int.from_bytes(signature[32:], "little")
-    R = decode_point(R_enc)
-    log("Decoded R", R)
     log("Scalar S from signature", S)
-    k = int.from_bytes(sha512(R_enc + encode_point(A) + message_bytes), "little") % l
+    if S >= l:
+        # Non-canonical S (S + l would verify too)
+        log("Signature valid?", False)
+        return False
+    k = int.from_bytes(sha512(dom + R_enc + encode_point(A) + message_bytes), "little") % l
     log("Challenge k", k)
-    SB = scalar_mult(B, S)
-    kA = scalar_mult(A, k)
-    log("Point SB", SB)
-    log("Point k*A", kA)
-    R_plus_kA = ed_add(R, kA)
-    log("Point R + k*A", R_plus_kA)
-    valid = SB == R_plus_kA
+    valid = check_signature(A, R_enc, S, k)
     log("Signature valid?", valid)
     return valid
+
+def check_signature(A, R_enc, S, k):
+    # R == S*B - k*A, one double-scalar multiplication, compared with the encoded R
+    R_check = double_scalar_mult(S, k, ed_neg(A))
+    log("Point S*B - k*A", R_check)
+    return matches_encoding(R_check, R_enc)
+
+# ----------------------
+# Ed25519ph (RFC 8032 section 5.1)
+# The message is replaced by its 64-byte SHA512 digest PH(M), so a large file
+# is hashed once with sha512_file and never held in memory.
+# ----------------------
+def sign_prehashed(a, prefix, A, digest, context=b""):
+    return sign_with_domain(a, A, prefix, digest, dom2(1, context))
+
+def verify_prehashed(A, digest, signature, context=b""):
+    return verify_with_domain(A, digest, signature, dom2(1, context))
+
+# ----------------------
+# Batch verification
+# Random linear combination with 128-bit z_i:
+#   (sum z_i*S_i) * B - sum z_i * R_i - sum (z_i*k_i) * A_i == 0
+# A failing batch is split in halves until the bad signatures are found;
+# small groups are checked one by one with check_signature() and the same k.
+# Same answer as verify() for honestly generated keys; like every
+# cofactorless batch check, crafted small-order components may differ.
+# ----------------------
+BATCH_MIN = 4
+
+def batch_equation(group):
+    b_coef = 0
+    scalars, points = [], []
+    for _, A, _, _, R, S, k in group:
+        z = secrets.randbits(128) | 1
+        b_coef += z * S
+        scalars += [z, z * k % l]
+        points += [ed_neg(R), ed_neg(A)]
+    Q = ed_add(scalar_mult_base(b_coef % l), multi_scalar_mult(scalars, points))
+    return is_identity(Q)
+
+def batch_check(group, results):
+    if len(group) <= BATCH_MIN:
+        for i, A, _, signature, _, S, k in group:
+            results[i] = check_signature(A, signature[:32], S, k)
+        return
+    if batch_equation(group):
+        for item in group:
+            results[item[0]] = True
+        return
+    half = len(group) // 2
+    batch_check(group[:half], results)
+    batch_check(group[half:], results)
+
+def verify_batch(items):
+    # items: [(A, message_bytes, signature), ...], A as a point or 32-byte encoding
+    # Returns one bool per item
+    results = [False] * len(items)
+    points = [A for A, _, _ in items if not isinstance(A, (bytes, bytearray))]
+    encoded = iter(encode_points(points)) if points else iter(())
+    group = []
+    for i, (A, message_bytes, signature) in enumerate(items):
+        if isinstance(A, (bytes, bytearray)):
+            A_enc = bytes(A)
+            if len(A_enc) != 32:
+                continue
+            try:
+                A = decode_point(A_enc)
+            except ValueError:
+                continue
+        else:
+            A_enc = next(encoded)
+        if len(signature) != 64:
+            continue
+        S = int.from_bytes(signature[32:], "little")
+        if S >= l:
+            continue
+        try:
+            R = decode_point(signature[:32])
+        except ValueError:
+            continue
+        k = int.from_bytes(sha512(signature[:32] + A_enc + message_bytes), "little") % l
+        group.append((i, A, message_bytes, signature, R, S, k))
+    batch_check(group, results)
+    log("Batch valid", f"{sum(results)}/{len(items)}")
+    return results
@@ -1,15 +1,28 @@
+import os
+import sys
+import json
 import hashlib
 
+# Dùng chung hệ thống trace của CK (thư mục cha)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Trace import channel
+
+trace = channel("ed25519")
+
+def log(msg, value):
+    """In giá trị trung gian khi kênh trace "ed25519" được bật (bytes in dạng hex)."""
+    if trace.enabled():
+        trace("[LOG] {}: {}", msg, value.hex() if isinstance(value, (bytes, bytearray)) else value)
+
 # ----------------------
 # Curve Ed25519 Constants
 # ----------------------
 p  = 2**255 - 19
 d  = 37095705934669439343138083508754565189542113879843219016388785533085940283555
 l  = 2**252 + 27742317777372353535851937790883648493
-B  = (
-    15112221349535400772501151409588531511454012693041857206046113283949847762202,
-    46316835694926478169428394003475163141307993866256225615783033603165251855960
-)
+Bx = 15112221349535400772501151409588531511454012693041857206046113283949847762202
+By = 46316835694926478169428394003475163141307993866256225615783033603165251855960
+B  = (Bx, By, 1, Bx * By % p)   # base point, extended coordinates
 
 # ----------------------
 # SHA512
@@ -17,6 +30,33 @@ B  = (
 def sha512(data: bytes) -> bytes:
     return hashlib.sha512(data).digest()
 
+# ----------------------
+# Streaming SHA512 (Ed25519ph prehash)
+# One pass over the file through a reused buffer: memory stays at one chunk
+# whatever the file size.
+# ----------------------
+HASH_CHUNK = 1 << 20
+
+def sha512_file(path, chunk_size: int = HASH_CHUNK) -> bytes:
+    h = hashlib.sha512()
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.digest()
+
+# ----------------------
+# dom2 prefix (RFC 8032 section 5.1)
+# ----------------------
+def dom2(phflag: int, context: bytes = b"") -> bytes:
+    if len(context) > 255:
+        raise ValueError("context must be at most 255 bytes")
+    return b"SigEd25519 no Ed25519 collisions" + bytes([phflag, len(context)]) + context
+
 # ----------------------
 # Clamping scalar
 # ----------------------
@@ -34,54 +74,393 @@ def inv(x, m):
     return pow(x, m-2, m)
 
 # ----------------------
-# Point operations (Twisted Edwards)
+# Point operations (Twisted Edwards, a = -1)
+# Extended coordinates (X:Y:Z:T): x = X/Z, y = Y/Z, x*y = T/Z.
+# No inversion in add/double; convert to affine only in encode_point.
 # ----------------------
+d2 = 2 * d % p
+IDENTITY = (0, 1, 1, 0)
+
+def to_extended(P):
+    x, y = P
+    return (x % p, y % p, 1, x * y % p)
+
+def to_affine(P):
+    X, Y, Z, _ = P
+    z_inv = inv(Z, p)
+    return (X * z_inv % p, Y * z_inv % p)
+
 def ed_add(P, Q):
-    # P + Q on Ed25519
-    x1, y1 = P
-    x2, y2 = Q
-    x3 = ((x1*y2 + x2*y1) * inv(1 + d*x1*x2*y1*y2, p)) % p
-    y3 = ((y1*y2 + x1*x2) * inv(1 - d*x1*x2*y1*y2, p)) % p
-    return (x3, y3)
+    # P + Q (add-2008-hwcd-3, unified: also valid for P == Q)
+    X1, Y1, Z1, T1 = P
+    X2, Y2, Z2, T2 = Q
+    A = (Y1 - X1) * (Y2 - X2) % p
+    B = (Y1 + X1) * (Y2 + X2) % p
+    C = T1 * d2 * T2 % p
+    D = 2 * Z1 * Z2 % p
+    E, F, G, H = B - A, D - C, D + C, B + A
+    return (E * F % p, G * H % p, F * G % p, E * H % p)
 
 def ed_double(P):
-    return ed_add(P, P)
+    # 2P (dbl-2008-hwcd, does not use T)
+    X1, Y1, Z1, _ = P
+    A = X1 * X1 % p
+    B = Y1 * Y1 % p
+    C = 2 * Z1 * Z1 % p
+    H = A + B
+    E = H - (X1 + Y1) * (X1 + Y1)
+    G = A - B
+    F = C + G
+    return (E * F % p, G * H % p, F * G % p, E * H % p)
+
+def ed_neg(P):
+    X, Y, Z, T = P
+    return (-X % p, Y, Z, -T % p)
+
+def point_equal(P, Q):
+    # Projective comparison: X1/Z1 == X2/Z2 and Y1/Z1 == Y2/Z2
+    X1, Y1, Z1, _ = P
+    X2, Y2, Z2, _ = Q
+    return (X1 * Z2 - X2 * Z1) % p == 0 and (Y1 * Z2 - Y2 * Z1) % p == 0
 
 def scalar_mult(P, e: int):
-    # Montgomery ladder
-    Q = (0, 1)  # neutral element
+    # Double-and-add from the most significant bit
+    Q = IDENTITY
     for i in reversed(range(e.bit_length())):
         Q = ed_double(Q)
         if (e >> i) & 1:
             Q = ed_add(Q, P)
     return Q
 
+# ----------------------
+# Fixed-base table for B (radix 16, signed digits, like ref10)
+# rows[i][j] = (j+1) * 16^i * B, j = 0..7, stored as (y+x, y-x, 2*d*x*y) affine.
+# k*B = sum e_i * 16^i * B with e_i in [-8, 8]: 64 mixed additions, no doubling.
+# Set CK_ED25519_TABLE_CACHE=<file> to save the table and load it in later processes
+# (a loaded table is fully checked, which costs about as much as rebuilding it).
+# ----------------------
+TABLE_ROWS = 64
+TABLE_CACHE = os.environ.get("CK_ED25519_TABLE_CACHE")
+_base_table = None
+
+def batch_inv(values):
+    # Montgomery's trick: one inversion for the whole list
+    prefix = []
+    acc = 1
+    for v in values:
+        prefix.append(acc)
+        acc = acc * v % p
+    acc_inv = inv(acc, p)
+    result = [0] * len(values)
+    for i in range(len(values) - 1, -1, -1):
+        result[i] = acc_inv * prefix[i] % p
+        acc_inv = acc_inv * values[i] % p
+    return result
+
+def to_precomp(points):
+    # Extended points -> (y+x, y-x, 2*d*x*y) affine, one inversion for all
+    z_invs = batch_inv([P[2] for P in points])
+    result = []
+    for (X, Y, _, _), z_inv in zip(points, z_invs):
+        x, y = X * z_inv % p, Y * z_inv % p
+        result.append(((y + x) % p, (y - x) % p, d2 * x * y % p))
+    return result
+
+def ed_add_precomp(P, q):
+    # P + q, q in (y+x, y-x, 2*d*x*y) form (madd-2008-hwcd-3)
+    X1, Y1, Z1, T1 = P
+    ypx, ymx, xy2d = q
+    A = (Y1 - X1) * ymx % p
+    B = (Y1 + X1) * ypx % p
+    C = T1 * xy2d % p
+    D = 2 * Z1
+    E, F, G, H = B - A, D - C, D + C, B + A
+    return (E * F % p, G * H % p, F * G % p, E * H % p)
+
+def build_base_table():
+    rows = []
+    base = B
+    for _ in range(TABLE_ROWS):
+        row = [base]
+        for _ in range(7):
+            row.append(ed_add(row[-1], base))
+        rows.append(row)
+        base = ed_double(row[7])         # 16 * base = 2 * (8 * base)
+    flat = to_precomp([P for row in rows for P in row])
+    return [flat[i:i + 8] for i in range(0, len(flat), 8)]
+
+def save_base_table(path, rows):
+    data = {"curve": "ed25519", "rows": [[[hex(v) for v in q] for q in row] for row in rows]}
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+def precomp_affine(q):
+    # (y+x, y-x, 2*d*x*y) -> affine (x, y)
+    ypx, ymx, _ = q
+    half = (p + 1) // 2
+    return (ypx - ymx) * half % p, (ypx + ymx) * half % p
+
+def is_affine_sum(P, Q, R):
+    # P + Q == R for affine points, checked without inversion (unified addition law, a = -1)
+    (x1, y1), (x2, y2), (x3, y3) = P, Q, R
+    t = d * x1 * x2 * y1 * y2 % p
+    return (x3 * (1 + t) - x1 * y2 - y1 * x2) % p == 0 and (y3 * (1 - t) - y1 * y2 - x1 * x2) % p == 0
+
+def base_table_valid(rows):
+    # Full check of a loaded table: shape, (y+x, y-x, 2*d*x*y) form of every entry,
+    # rows[0][0] == B, rows[i][j] == rows[i][j-1] + rows[i][0], rows[i+1][0] == 2 * rows[i][7].
+    # The chain starts at B and the addition law is complete, so every entry is then on the curve.
+    if len(rows) != TABLE_ROWS or any(len(row) != 8 for row in rows):
+        return False
+    if rows[0][0] != to_precomp([B])[0]:
+        return False
+    points = []
+    for row in rows:
+        pts = []
+        for q in row:
+            if len(q) != 3 or not all(0 <= v < p for v in q):
+                return False
+            x, y = precomp_affine(q)
+            if q[2] != d2 * x * y % p:
+                return False
+            pts.append((x, y))
+        points.append(pts)
+    for i, pts in enumerate(points):
+        for j in range(1, 8):
+            if not is_affine_sum(pts[j - 1], pts[0], pts[j]):
+                return False
+        if i + 1 < TABLE_ROWS and not is_affine_sum(pts[7], pts[7], points[i + 1][0]):
+            return False
+    return True
+
+def load_base_table(path):
+    # Returns None (table is rebuilt) if the file is missing, corrupt or does not match
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        if data["curve"] != "ed25519":
+            return None
+        rows = [[tuple(int(v, 16) for v in q) for q in row] for row in data["rows"]]
+        if not base_table_valid(rows):
+            return None
+    except Exception:
+        return None
+    return rows
+
+def base_table():
+    global _base_table
+    if _base_table is None:
+        rows = load_base_table(TABLE_CACHE) if TABLE_CACHE else None
+        if rows is None:
+            rows = build_base_table()
+            if TABLE_CACHE:
+                save_base_table(TABLE_CACHE, rows)
+        _base_table = rows
+    return _base_table
+
+def signed_radix16(e: int):
+    # 64 digits in [-8, 8], e = sum digits[i] * 16^i (e < 2^255)
+    digits = [(e >> (4 * i)) & 15 for i in range(64)]
+    carry = 0
+    for i in range(63):
+        digits[i] += carry
+        carry = (digits[i] + 8) >> 4
+        digits[i] -= carry << 4
+    digits[63] += carry
+    return digits
+
+def scalar_mult_base(e: int):
+    # e * B using the fixed-base table
+    Q = IDENTITY
+    for row, digit in zip(base_table(), signed_radix16(e % l)):
+        if digit > 0:
+            Q = ed_add_precomp(Q, row[digit - 1])
+        elif digit < 0:
+            ypx, ymx, xy2d = row[-digit - 1]
+            Q = ed_add_precomp(Q, (ymx, ypx, -xy2d % p))
+    return Q
+
+# ----------------------
+# Double-scalar multiplication s*B + k*P (Straus, one doubling chain)
+# wNAF digits for both scalars: odd multiples of P built per call,
+# odd multiples of B precomputed once in (y+x, y-x, 2*d*x*y) form.
+# ----------------------
+WNAF_WINDOW = 5
+B_WNAF_WINDOW = 8
+_base_odd = None
+
+def wnaf(k: int, w: int):
+    # Odd digits |d| < 2^(w-1) or 0, least significant first
+    digits = []
+    half, full = 1 << (w - 1), 1 << w
+    while k:
+        if k & 1:
+            dgt = k & (full - 1)
+            if dgt >= half:
+                dgt -= full
+            k -= dgt
+        else:
+            dgt = 0
+        digits.append(dgt)
+        k >>= 1
+    return digits
+
+def odd_multiples(P, w: int):
+    # [P, 3P, 5P, ..., (2^(w-1) - 1)P] in extended coordinates
+    P2 = ed_double(P)
+    result = [P]
+    for _ in range((1 << (w - 2)) - 1):
+        result.append(ed_add(result[-1], P2))
+    return result
+
+def base_odd_multiples():
+    global _base_odd
+    if _base_odd is None:
+        _base_odd = to_precomp(odd_multiples(B, B_WNAF_WINDOW))
+    return _base_odd
+
+def double_scalar_mult(s: int, k: int, P):
+    # s*B + k*P (variable time: only for public values, i.e. verification)
+    b_digits = wnaf(s, B_WNAF_WINDOW)
+    p_digits = wnaf(k, WNAF_WINDOW)
+    b_table = base_odd_multiples()
+    p_table = odd_multiples(P, WNAF_WINDOW)
+    length = max(len(b_digits), len(p_digits))
+    b_digits += [0] * (length - len(b_digits))
+    p_digits += [0] * (length - len(p_digits))
+    Q = IDENTITY
+    for db, dp in zip(reversed(b_digits), reversed(p_digits)):
+        Q = ed_double(Q)
+        if db > 0:
+            Q = ed_add_precomp(Q, b_table[db >> 1])
+        elif db < 0:
+            ypx, ymx, xy2d = b_table[(-db) >> 1]
+            Q = ed_add_precomp(Q, (ymx, ypx, -xy2d % p))
+        if dp > 0:
+            Q = ed_add(Q, p_table[dp >> 1])
+        elif dp < 0:
+            Q = ed_add(Q, ed_neg(p_table[(-dp) >> 1]))
+    return Q
+
+def matches_encoding(P, b: bytes) -> bool:
+    # encode_point(P) == b, without decoding b:
+    # compare y projectively first (Y == y*Z), invert Z only to check the sign of x
+    y = int.from_bytes(b[:32], "little") & ((1 << 255) - 1)
+    if y >= p:
+        return False
+    X, Y, Z, _ = P
+    if (Y - y * Z) % p != 0:
+        return False
+    x = X * inv(Z, p) % p
+    return (x & 1) == (b[31] >> 7)
+
+# ----------------------
+# Multi-scalar multiplication sum k_i * P_i (Pippenger, signed buckets)
+# ----------------------
+def signed_digits(e: int, c: int, count: int):
+    # count digits in [-2^(c-1), 2^(c-1)], e = sum digits[i] * 2^(c*i)
+    mask, half = (1 << c) - 1, 1 << (c - 1)
+    digits = []
+    carry = 0
+    for _ in range(count):
+        dgt = (e & mask) + carry
+        e >>= c
+        carry = 1 if dgt > half else 0
+        digits.append(dgt - (carry << c))
+    return digits
+
+def pippenger_window(n: int) -> int:
+    # Window size minimizing roughly (bits/c) * (n + 2^c)
+    if n < 16:
+        return 3
+    return max(3, min(12, n.bit_length() - 2))
+
+def multi_scalar_mult(scalars, points):
+    # sum scalars[i] * points[i] (variable time: only for public values)
+    if not points:
+        return IDENTITY
+    c = pippenger_window(len(points))
+    bits = max(k.bit_length() for k in scalars) + 1
+    count = (bits + c - 1) // c
+    digits = [signed_digits(k, c, count) for k in scalars]
+    negs = [ed_neg(P) for P in points]
+    Q = IDENTITY
+    for j in reversed(range(count)):
+        for _ in range(c):
+            Q = ed_double(Q)
+        buckets = [None] * ((1 << (c - 1)) + 1)
+        for i, ds in enumerate(digits):
+            dgt = ds[j]
+            if dgt:
+                P = points[i] if dgt > 0 else negs[i]
+                b = buckets[abs(dgt)]
+                buckets[abs(dgt)] = P if b is None else ed_add(b, P)
+        # sum b * bucket[b] with a running sum: 2 additions per bucket
+        running = total = None
+        for b in reversed(buckets[1:]):
+            if b is not None:
+                running = b if running is None else ed_add(running, b)
+            if running is not None:
+                total = running if total is None else ed_add(total, running)
+        if total is not None:
+            Q = ed_add(Q, total)
+    return Q
+
+def is_identity(P) -> bool:
+    X, Y, Z, _ = P
+    return X % p == 0 and (Y - Z) % p == 0
+
 # ----------------------
 # Encode/Decode points
 # ----------------------
+SQRT_M1 = pow(2, (p - 1) // 4, p)
+
 def recover_x(y, sign_bit):
+    # x^2 = u/v; one exponentiation: x = u*v^3 * (u*v^7)^((p-5)/8)
+    # ValueError if y is not on the curve or the encoding is not canonical
+    if y >= p:
+        raise ValueError("Non-canonical y")
     y2 = y*y % p
     u = (y2 - 1) % p
     v = (d*y2 + 1) % p
-    inv_v = pow(v, p-2, p)
-    x2 = (u*inv_v) % p
-    x = pow(x2, (p+3)//8, p)
-    if (x*x - x2) % p != 0:
-        x = (x * pow(2,(p-1)//4,p)) % p
+    v3 = v*v*v % p
+    x = u * v3 * pow(u * v3 * v3 * v, (p-5)//8, p) % p
+    vx2 = v*x*x % p
+    if vx2 != u:
+        if vx2 != (-u) % p:
+            raise ValueError("Point is not on the curve")
+        x = (x * SQRT_M1) % p
+    if x == 0 and sign_bit:
+        raise ValueError("Non-canonical x sign")
     if x & 1 != sign_bit:
         x = p - x
     return x
 
 def encode_point(P):
-    x, y = P
+    x, y = to_affine(P)
     b = y.to_bytes(32, "little")
     if x & 1:
         b = bytearray(b)
         b[31] |= 0x80
     return bytes(b)
 
+def encode_points(points):
+    # encode_point for many points, one inversion for all
+    z_invs = batch_inv([P[2] for P in points])
+    result = []
+    for (X, Y, _, _), z_inv in zip(points, z_invs):
+        x, y = X * z_inv % p, Y * z_inv % p
+        b = bytearray(y.to_bytes(32, "little"))
+        b[31] |= (x & 1) << 7
+        result.append(bytes(b))
+    return result
+
 def decode_point(b):
-    y = int.from_bytes(b[:32], "little") & ((1<<255)-1)
+    if len(b) != 32:
+        raise ValueError("encoded point must be 32 bytes")
+    y = int.from_bytes(b, "little") & ((1<<255)-1)
     sign_x = (b[31] >> 7) & 1
     x = recover_x(y, sign_x)
-    return (x, y)
+    return to_extended((x, y))
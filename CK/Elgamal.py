@@ -1,6 +1,13 @@
 import secrets
 import math
 import sys
+import functools
+from PrimeSieve import find_prime, SieveStats
+from Primality import miller_rabin_rounds, miller_rabin, trial_division
+from Trace import channel, enable_demo_tracing
+from PrecomputePool import PrecomputePool
+
+trace = channel("elgamal")
 
 def factorize(n: int) -> set:
     """Phân tích n thành các thừa số nguyên tố (chậm, chỉ dùng n nhỏ)."""
@@ -27,7 +34,7 @@ def find_primitive_root(p: int) -> int:
         for q in factors:
             if pow(g, phi // q, p) == 1:
                 ok = False
-                print(f"g = {g} không phải phần tử nguyên thủy" )
+                trace("g = {} không phải phần tử nguyên thủy", g)
                 break
         if ok:
             return g
@@ -38,31 +45,12 @@ def find_primitive_root(p: int) -> int:
 def is_probable_prime(n: int, rounds: int = 64) -> bool:
     """
     Kiểm tra tính nguyên tố xác suất bằng thuật toán Miller-Rabin.
+    Mặc định 64 vòng; khi sinh khóa, nơi gọi truyền miller_rabin_rounds(bits, "keygen").
     """
-    if n < 2: return False
-    small_primes = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31]
-    if n in small_primes: return True
-    for p in small_primes:
-        if n % p == 0: return False
-
-    d = n - 1
-    r = 0
-    while d % 2 == 0:
-        d //= 2
-        r += 1
-
-    for _ in range(rounds):
-        a = secrets.randbelow(n - 3) + 2  
-        x = pow(a, d, n)
-        if x == 1 or x == n - 1:
-            continue
-        for _ in range(r - 1):
-            x = pow(x, 2, n)
-            if x == n - 1:
-                break
-        else:
-            return False
-    return True
+    small = trial_division(n)
+    if small is not None:
+        return small
+    return miller_rabin(n, rounds)
 
 def random_odd_with_msb(bits: int) -> int:
     """Sinh số ngẫu nhiên lẻ có độ dài chính xác là 'bits'."""
@@ -71,16 +59,15 @@ def random_odd_with_msb(bits: int) -> int:
     n |= 1                  # Đặt bit thấp nhất (số lẻ)
     return n
 
-def generate_strong_prime(bits: int) -> int:
-    """Tìm số nguyên tố xác suất có độ dài bits."""
-    sys.stdout.write(f"\rDang tim prime {bits}-bit...")
-    sys.stdout.flush()
-    while True:
-        candidate = random_odd_with_msb(bits)
-        if is_probable_prime(candidate):
-            sys.stdout.write(f"\r Prime {bits}-bit da duoc sinh.")
-            sys.stdout.flush()
-            return candidate
+def generate_strong_prime(bits: int, stats: SieveStats = None) -> int:
+    """Tìm số nguyên tố xác suất có độ dài bits (tìm kiếm tăng dần có sàng)."""
+    if stats is None:
+        stats = SieveStats()
+    trace.info("Dang tim prime {}-bit...", bits)
+    rounds = miller_rabin_rounds(bits, "keygen")
+    candidate = find_prime(bits, lambda n: is_probable_prime(n, rounds), stats=stats)
+    trace.info(" Prime {}-bit da duoc sinh. Sang loc: {}", bits, stats)
+    return candidate
 
 def bytes_to_integer(b: bytes) -> int:
     """Chuyển đổi bytes sang integer (Big Endian)."""
@@ -107,10 +94,10 @@ def generate_elgamal_keypair(bits: int = 2048):
     
     public_key = (p, g, y)
     private_key = (p, g, x)
-    print(f"\n p = {p}")
-    print(f"\n g = {g}")
-    print(f"\n x = {x}")
-    print(f"\n y = {y}")
+    trace("\n p = {}", p)
+    trace("\n g = {}", g)
+    trace("\n x = {}", x)
+    trace("\n y = {}", y)
     return public_key, private_key
 
 def elgamal_encrypt_message(message_int: int, public_key: tuple) -> tuple:
@@ -130,12 +117,119 @@ def elgamal_encrypt_message(message_int: int, public_key: tuple) -> tuple:
     
     # c2 = m * s mod p
     c2 = (message_int * s) % p
-    print(f"\n k = {k}")
-    print(f"\n c1 = {c1}")
-    print(f"\n s = {s}")
-    print(f"\n c2 = {c2}")
+    trace("\n k = {}", k)
+    trace("\n c1 = {}", c1)
+    trace("\n s = {}", s)
+    trace("\n c2 = {}", c2)
     return (c1, c2)
 
+# Độ rộng cửa sổ của bảng lũy thừa cơ số cố định và số khóa công khai giữ trong cache
+FIXED_BASE_WINDOW = 5
+PRECOMP_CACHE_SIZE = 16
+
+class FixedBaseTable:
+    """
+    Bảng lũy thừa cơ số cố định (windowed): rows[i][j] = base^(j * 2^(w*i)) mod p.
+    base^k = tích các rows[i][chữ số thứ i của k theo cơ số 2^w], không cần bình phương.
+    """
+    def __init__(self, base: int, p: int, exp_bits: int, window: int = FIXED_BASE_WINDOW):
+        self.p = p
+        self.window = window
+        self.mask = (1 << window) - 1
+        self.rows = []
+        b = base % p
+        for _ in range((exp_bits + window - 1) // window):
+            row = [1, b]
+            for _ in range(2, 1 << window):
+                row.append(row[-1] * b % p)
+            self.rows.append(row)
+            # Cơ số của hàng kế tiếp: b^(2^w)
+            b = row[-1] * b % p
+
+    def pow(self, k: int) -> int:
+        """Tính base^k mod p bằng tra bảng (k < 2^exp_bits)."""
+        if k.bit_length() > len(self.rows) * self.window:
+            raise ValueError("So mu vuot qua kich thuoc bang")
+        p, mask, w = self.p, self.mask, self.window
+        result = 1
+        for row in self.rows:
+            if not k:
+                break
+            digit = k & mask
+            if digit:
+                result = result * row[digit] % p
+            k >>= w
+        return result
+
+
+class ElGamalPrecomputation:
+    """Bảng cơ số cố định cho g và y của một khóa công khai, dựng một lần và dùng cho mọi lần mã hóa."""
+    def __init__(self, public_key: tuple, window: int = FIXED_BASE_WINDOW):
+        p, g, y = public_key
+        self.public_key = public_key
+        bits = (p - 1).bit_length()
+        self.g_table = FixedBaseTable(g, p, bits, window)
+        self.y_table = FixedBaseTable(y, p, bits, window)
+
+    def ephemeral(self) -> tuple:
+        """Sinh k ngẫu nhiên và trả về (k, c1 = g^k, s = y^k) bằng tra bảng."""
+        p = self.public_key[0]
+        k = secrets.randbelow(p - 2) + 1
+        return k, self.g_table.pow(k), self.y_table.pow(k)
+
+    def encrypt(self, message_int: int) -> tuple:
+        """Mã hóa m thành (c1, c2) như elgamal_encrypt_message, nhưng không cần lũy thừa đầy đủ."""
+        p = self.public_key[0]
+        if not (0 < message_int < p):
+            raise ValueError("So nguyen thong diep vuot qua gioi han modulus (p)")
+        k, c1, s = self.ephemeral()
+        c2 = (message_int * s) % p
+        trace("\n k = {}", k)
+        trace("\n c1 = {}", c1)
+        trace("\n s = {}", s)
+        trace("\n c2 = {}", c2)
+        return (c1, c2)
+
+@functools.lru_cache(maxsize=PRECOMP_CACHE_SIZE)
+def get_precomputation(public_key: tuple) -> ElGamalPrecomputation:
+    """Lấy bảng tính sẵn của khóa công khai (cache LRU theo khóa, loại bỏ khóa ít dùng nhất)."""
+    return ElGamalPrecomputation(tuple(public_key))
+
+def elgamal_encrypt_precomputed(message_int: int, public_key: tuple) -> tuple:
+    """Mã hóa ElGamal dùng bảng cơ số cố định của khóa công khai (dựng ở lần đầu, sau đó lấy từ cache)."""
+    return get_precomputation(tuple(public_key)).encrypt(message_int)
+
+class ElGamalOnlineEncryptor:
+    """
+    Mã hóa ElGamal offline/online cho một khóa công khai.
+    Offline: thread nền tính sẵn các cặp (c1 = g^k, s = y^k) vào pool giới hạn.
+    Online: encrypt() chỉ còn một phép nhân c2 = m * s mod p; mỗi cặp chỉ dùng một lần.
+    """
+    def __init__(self, public_key: tuple, depth: int = 64, low_water: int = None):
+        self.public_key = tuple(public_key)
+        precomputation = get_precomputation(self.public_key)
+        self.pool = PrecomputePool(lambda: precomputation.ephemeral()[1:], depth, low_water)
+
+    def start(self):
+        self.pool.start()
+        return self
+
+    def stop(self):
+        self.pool.stop()
+
+    def encrypt(self, message_int: int) -> tuple:
+        p = self.public_key[0]
+        if not (0 < message_int < p):
+            raise ValueError("So nguyen thong diep vuot qua gioi han modulus (p)")
+        c1, s = self.pool.take()
+        c2 = (message_int * s) % p
+        trace("\n c1 = {}", c1)
+        trace("\n c2 = {}", c2)
+        return (c1, c2)
+
+    def stats(self) -> dict:
+        return self.pool.stats()
+
 def elgamal_decrypt_cipher(cipher_pair: tuple, private_key: tuple) -> int:
     """Giải mã bản mã (c1, c2) thành số nguyên thông điệp m."""
     p, g, x = private_key
@@ -143,17 +237,18 @@ def elgamal_decrypt_cipher(cipher_pair: tuple, private_key: tuple) -> int:
     
     # 1. Tinh lai Shared secret: s = c1^x mod p
     s = pow(c1, x, p)
-    print(f"\n s = {s}")
+    trace("\n s = {}", s)
     # 2. Tinh nghich dao cua s: s_inv = s^(-1) mod p
     s_inv = pow(s, -1, p) 
-    print(f"\n s_inv = {s_inv}")
+    trace("\n s_inv = {}", s_inv)
     # 3. Giai ma: m = c2 * s_inv mod p
     # Vi c2 = m * s mod p, suy ra m = c2 * s^(-1) mod p
     m = (c2 * s_inv) % p
-    print(f"\n m = {m}")
+    trace("\n m = {}", m)
     return m
 
 if __name__ == "__main__":
+    enable_demo_tracing()
     print("--- DEMO THUẬT TOÁN MÃ HÓA ELGAMAL 2048-BIT ---")
     
     # Sinh khóa
@@ -5,6 +5,7 @@ from Elgamal import (
     bytes_to_integer as b2i,
     integer_to_bytes as i2b
 )
+from Trace import enable_demo_tracing
 
 def demo_elgamal_encryption_exchange():
     """Minh họa quy trình Mã hóa và Giải mã ElGamal 2048-bit."""
@@ -43,4 +44,5 @@ def demo_elgamal_encryption_exchange():
     print("Alice: Khop voi thong diep ban dau =", is_match)
 
 if __name__ == "__main__":
+    enable_demo_tracing()
     demo_elgamal_encryption_exchange()
\ No newline at end of file
@@ -0,0 +1,220 @@
+import os
+import hmac
+import struct
+import hashlib
+import secrets
+import tempfile
+import multiprocessing as mp
+from RSA import rsa_encrypt_integer, rsa_decrypt_integer_crt
+from Elgamal import elgamal_encrypt_message, elgamal_decrypt_cipher
+from Trace import channel, enable_demo_tracing
+
+trace = channel("hybrid")
+
+# Định dạng file: MAGIC | scheme (1 byte) | chunk_size (4 byte) | nonce (16 byte) | len(kem) (4 byte) | kem
+# sau đó là các khối: len (4 byte) | ciphertext | tag HMAC-SHA256 (32 byte)
+MAGIC = b"CKHF1"
+SCHEME_RSA = 1
+SCHEME_ELGAMAL = 2
+NONCE_LEN = 16
+TAG_LEN = 32
+DEFAULT_CHUNK = 1 << 20
+
+def integer_length(x: int) -> int:
+    return (x.bit_length() + 7) // 8
+
+def derive_keys(secret: int, header: bytes) -> tuple:
+    """Sinh khóa mã (enc_key) và khóa xác thực (mac_key) từ bí mật phiên, gắn với toàn bộ header."""
+    okm = hashlib.sha512(MAGIC + secret.to_bytes(integer_length(secret) or 1, "big") + header).digest()
+    return okm[:32], okm[32:]
+
+def encapsulate(public_key) -> tuple:
+    """Chọn bí mật phiên ngẫu nhiên và mã hóa nó bằng RSA hoặc ElGamal. Trả về (scheme, secret, kem)."""
+    if isinstance(public_key, dict):
+        n = public_key["n"]
+        secret = secrets.randbelow(n - 2) + 2
+        c = rsa_encrypt_integer(secret, public_key)
+        return SCHEME_RSA, secret, c.to_bytes(integer_length(n), "big")
+    p = public_key[0]
+    secret = secrets.randbelow(p - 2) + 1
+    c1, c2 = elgamal_encrypt_message(secret, public_key)
+    plen = integer_length(p)
+    return SCHEME_ELGAMAL, secret, c1.to_bytes(plen, "big") + c2.to_bytes(plen, "big")
+
+def kem_length(scheme: int, private_key) -> int:
+    """Độ dài đúng của phần kem theo khóa bí mật: n (RSA) hoặc 2 * p (ElGamal) byte."""
+    if scheme == SCHEME_RSA:
+        if not isinstance(private_key, dict):
+            raise ValueError("File duoc ma hoa bang RSA, can khoa bi mat RSA")
+        return integer_length(private_key["n"])
+    if scheme == SCHEME_ELGAMAL:
+        if isinstance(private_key, dict):
+            raise ValueError("File duoc ma hoa bang ElGamal, can khoa bi mat ElGamal")
+        return 2 * integer_length(private_key[0])
+    raise ValueError(f"Scheme khong hop le: {scheme}")
+
+def decapsulate(scheme: int, kem: bytes, private_key) -> int:
+    """Giải mã bí mật phiên từ phần kem của header."""
+    if len(kem) != kem_length(scheme, private_key):
+        raise ValueError("Do dai kem khong khop voi khoa bi mat")
+    if scheme == SCHEME_RSA:
+        return rsa_decrypt_integer_crt(int.from_bytes(kem, "big"), private_key)
+    half = len(kem) // 2
+    return elgamal_decrypt_cipher((int.from_bytes(kem[:half], "big"), int.from_bytes(kem[half:], "big")),
+                                  private_key)
+
+def keystream_xor(enc_key: bytes, index: int, data: bytes) -> bytes:
+    """XOR dữ liệu với dòng khóa SHAKE-256(enc_key || index) của khối."""
+    if not data:
+        return b""
+    stream = hashlib.shake_256(enc_key + index.to_bytes(8, "big")).digest(len(data))
+    return (int.from_bytes(data, "big") ^ int.from_bytes(stream, "big")).to_bytes(len(data), "big")
+
+def chunk_tag(mac_key: bytes, index: int, final: bool, ciphertext: bytes) -> bytes:
+    """Tag HMAC-SHA256 trên (index, cờ khối cuối, ciphertext) chống hoán đổi và cắt bớt khối."""
+    return hmac.new(mac_key, index.to_bytes(8, "big") + bytes([final]) + ciphertext, hashlib.sha256).digest()
+
+def encrypt_chunk(job: tuple) -> bytes:
+    """Mã hóa một khối: trả về len | ciphertext | tag."""
+    enc_key, mac_key, index, final, data = job
+    ct = keystream_xor(enc_key, index, data)
+    return struct.pack(">I", len(ct)) + ct + chunk_tag(mac_key, index, final, ct)
+
+def decrypt_chunk(job: tuple) -> bytes:
+    """Kiểm tra tag rồi giải mã một khối. Sai tag -> ValueError."""
+    enc_key, mac_key, index, final, ct, tag = job
+    if not hmac.compare_digest(tag, chunk_tag(mac_key, index, final, ct)):
+        raise ValueError(f"Khoi {index} khong hop le (sai tag xac thuc)")
+    return keystream_xor(enc_key, index, ct)
+
+def run_jobs(fn, jobs: list, pool) -> list:
+    return pool.map(fn, jobs) if pool is not None else [fn(job) for job in jobs]
+
+def read_chunks(f, chunk_size: int):
+    """Đọc file theo từng khối, trả về (index, final, data). File rỗng vẫn có một khối cuối rỗng."""
+    index = 0
+    data = f.read(chunk_size)
+    while True:
+        nxt = f.read(chunk_size)
+        yield index, not nxt, data
+        if not nxt:
+            return
+        data = nxt
+        index += 1
+
+def encrypt_file(infile: str, outfile: str, public_key, chunk_size: int = DEFAULT_CHUNK, workers: int = 1):
+    """
+    Mã hóa lai một file: bí mật phiên được mã hóa bằng RSA (khóa dict) hoặc ElGamal (khóa tuple),
+    nội dung được mã theo từng khối chunk_size bằng SHAKE-256 + HMAC-SHA256.
+    Bộ nhớ dùng chỉ khoảng workers * 2 khối, không phụ thuộc kích thước file.
+    """
+    # chunk_size = 0 sẽ sinh một khối rỗng duy nhất (mất dữ liệu); header chỉ có 4 byte cho chunk_size
+    if not 0 < chunk_size < 2 ** 32:
+        raise ValueError("chunk_size phai nam trong khoang (0, 2^32)")
+    scheme, secret, kem = encapsulate(public_key)
+    nonce = secrets.token_bytes(NONCE_LEN)
+    header = MAGIC + struct.pack(">BI", scheme, chunk_size) + nonce + struct.pack(">I", len(kem)) + kem
+    enc_key, mac_key = derive_keys(secret, header)
+    # workers=None: dùng tất cả CPU (như rsa_private_batch, ECC.verify_batch)
+    workers = workers or os.cpu_count() or 1
+    batch = max(1, workers) * 2
+    pool = mp.Pool(workers) if workers > 1 else None
+    try:
+        with open(infile, "rb") as fin, open(outfile, "wb") as fout:
+            fout.write(header)
+            jobs = []
+            for index, final, data in read_chunks(fin, chunk_size):
+                jobs.append((enc_key, mac_key, index, final, data))
+                if len(jobs) == batch or final:
+                    for block in run_jobs(encrypt_chunk, jobs, pool):
+                        fout.write(block)
+                    jobs = []
+            trace.info("Da ma hoa {} khoi ({} byte/khoi)", index + 1, chunk_size)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+def read_exact(f, size: int) -> bytes:
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("File ma hoa bi cat cut")
+    return data
+
+def decrypt_file(infile: str, outfile: str, private_key, workers: int = 1):
+    """
+    Giải mã file tạo bởi encrypt_file. Mỗi khối được kiểm tra tag trước khi ghi ra;
+    file bị sửa, đổi thứ tự hoặc cắt bớt khối sẽ gây ValueError.
+    Bản rõ được ghi vào file tạm cạnh outfile và chỉ đổi tên thành outfile khi mọi khối hợp lệ,
+    nên khi lỗi không còn sót lại bản rõ của các khối trước đó.
+    """
+    # workers=None: dùng tất cả CPU (như rsa_private_batch, ECC.verify_batch)
+    workers = workers or os.cpu_count() or 1
+    batch = max(1, workers) * 2
+    pool = mp.Pool(workers) if workers > 1 else None
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(outfile) + ".", suffix=".tmp",
+                               dir=os.path.dirname(os.path.abspath(outfile)))
+    try:
+        with os.fdopen(fd, "wb") as fout, open(infile, "rb") as fin:
+            if read_exact(fin, len(MAGIC)) != MAGIC:
+                raise ValueError("Khong phai file ma hoa lai (sai MAGIC)")
+            fixed = read_exact(fin, 5 + NONCE_LEN + 4)
+            scheme, chunk_size = struct.unpack(">BI", fixed[:5])
+            (kem_len,) = struct.unpack(">I", fixed[-4:])
+            # kem_len lấy từ header (không tin cậy): so với độ dài đúng theo khóa trước khi đọc
+            if kem_len != kem_length(scheme, private_key):
+                raise ValueError("Do dai kem khong khop voi khoa bi mat")
+            kem = read_exact(fin, kem_len)
+            header = MAGIC + fixed + kem
+            enc_key, mac_key = derive_keys(decapsulate(scheme, kem, private_key), header)
+
+            index = 0
+            final = False
+            jobs = []
+            while not final:
+                (length,) = struct.unpack(">I", read_exact(fin, 4))
+                if length > chunk_size:
+                    raise ValueError(f"Khoi {index} khong hop le")
+                ct = read_exact(fin, length)
+                tag = read_exact(fin, TAG_LEN)
+                # Khối cuối là khối không còn dữ liệu phía sau. Cờ này nằm trong tag, nên file
+                # bị cắt bớt hoặc bị nối thêm dữ liệu đều sai tag.
+                final = not fin.peek(1)
+                jobs.append((enc_key, mac_key, index, final, ct, tag))
+                index += 1
+                if len(jobs) == batch or final:
+                    for data in run_jobs(decrypt_chunk, jobs, pool):
+                        fout.write(data)
+                    jobs = []
+        os.replace(tmp, outfile)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+def demo_hybrid_file_encryption():
+    """Minh họa mã hóa lai một file bằng khóa RSA và khóa ElGamal."""
+    from RSAKeyPool import get_rsa_keypair
+    from Elgamal import generate_elgamal_keypair
+
+    original = os.urandom(3 * DEFAULT_CHUNK + 12345)
+    with tempfile.TemporaryDirectory() as tmp:
+        plain = os.path.join(tmp, "plain.bin")
+        with open(plain, "wb") as f:
+            f.write(original)
+        for name, (pub, priv) in (("RSA", get_rsa_keypair(4096)), ("ElGamal", generate_elgamal_keypair(2048))):
+            enc = os.path.join(tmp, f"file.{name}.enc")
+            dec = os.path.join(tmp, f"file.{name}.dec")
+            encrypt_file(plain, enc, pub)
+            decrypt_file(enc, dec, priv)
+            with open(dec, "rb") as f:
+                recovered = f.read()
+            print(f"\n[{name}] Kich thuoc goc = {len(original)} byte, ban ma = {os.path.getsize(enc)} byte")
+            print(f"[{name}] Giai ma khop voi file goc = {recovered == original}")
+
+if __name__ == "__main__":
+    enable_demo_tracing()
+    demo_hybrid_file_encryption()
@@ -1,10 +1,11 @@
+from RSAKeyPool import get_rsa_keypair as generate_keys
 from RSA import (
-    generate_rsa_keypair as generate_keys,
     rsa_encrypt_integer as rsa_encrypt,
     rsa_decrypt_integer_crt as rsa_decrypt,
     bytes_to_integer as b2i,
     integer_to_bytes as i2b
 )
+from Trace import enable_demo_tracing
 
 def demo_rsa_encryption_exchange():
     """Minh họa quy trình Mã hóa và Giải mã RSA 4096-bit."""
@@ -44,4 +45,5 @@ def demo_rsa_encryption_exchange():
     print("Alice: Khop voi thong diep ban dau =", is_match)
 
 if __name__ == "__main__":
+    enable_demo_tracing()
     demo_rsa_encryption_exchange()
\ No newline at end of file
@@ -0,0 +1,75 @@
+import threading
+import collections
+
+class PrecomputePool:
+    """
+    Pool giới hạn các giá trị tính trước (offline), được nạp bởi một thread nền.
+    - produce(): hàm sinh một phần tử (phần tốn kém, không phụ thuộc thông điệp).
+    - depth: số phần tử tối đa giữ trong pool.
+    - low_water: khi số phần tử giảm xuống mức này, thread nền nạp lại đến depth.
+    Mỗi phần tử chỉ được lấy ra đúng một lần; pool rỗng thì take() tự tính trực tiếp.
+    """
+    def __init__(self, produce, depth: int = 64, low_water: int = None):
+        self.produce = produce
+        self.depth = depth
+        self.low_water = depth // 4 if low_water is None else low_water
+        self.items = collections.deque()
+        self.refill = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.hits = 0
+        self.misses = 0
+        self.produced = 0
+
+    def start(self):
+        """Khởi động thread nền và nạp đầy pool."""
+        if self.thread is not None and self.thread.is_alive():
+            return self
+        self.stopped.clear()
+        self.refill.set()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.refill.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.refill.wait()
+            while len(self.items) < self.depth and not self.stopped.is_set():
+                self.items.append(self.produce())
+                self.produced += 1
+            # Đã đầy: ngủ cho đến khi take() báo chạm mức low_water
+            self.refill.clear()
+            if len(self.items) <= self.low_water:
+                self.refill.set()
+
+    def take(self):
+        """Lấy một phần tử (dùng đúng một lần). Pool rỗng: tính trực tiếp."""
+        try:
+            item = self.items.popleft()
+            self.hits += 1
+        except IndexError:
+            item = self.produce()
+            self.misses += 1
+        if len(self.items) <= self.low_water:
+            self.refill.set()
+        return item
+
+    def stats(self) -> dict:
+        """Độ sâu hiện tại, số lần lấy trúng pool (hit), phải tính trực tiếp (miss) và tỉ lệ hit."""
+        total = self.hits + self.misses
+        return {
+            "ready": len(self.items),
+            "depth": self.depth,
+            "low_water": self.low_water,
+            "produced": self.produced,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
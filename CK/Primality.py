@@ -0,0 +1,156 @@
+import math
+import secrets
+
+SMALL_PRIMES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31]
+
+# Số vòng Miller-Rabin tối thiểu cho ứng viên NGẪU NHIÊN khi sinh khóa
+# (theo bảng FIPS 186-5 phụ lục B, sai số <= 2^-112): (số bit tối thiểu, số vòng)
+KEYGEN_ROUNDS = [
+    (1536, 4),
+    (1024, 5),
+    (512, 8),
+    (256, 16),
+]
+# Ứng viên không rõ nguồn gốc (có thể do đối thủ chọn): sai số <= 4^-rounds
+ADVERSARIAL_ROUNDS = 64
+DEFAULT_ROUNDS = 40
+
+def miller_rabin_rounds(bits: int, purpose: str = "keygen") -> int:
+    """
+    Chọn số vòng Miller-Rabin theo độ dài bit và mục đích sử dụng.
+    purpose = "keygen": ứng viên ngẫu nhiên khi sinh khóa (ít vòng, theo FIPS 186-5).
+    purpose = "adversarial": đầu vào có thể bị chọn có chủ đích (64 vòng).
+    """
+    if purpose == "adversarial":
+        return ADVERSARIAL_ROUNDS
+    if purpose != "keygen":
+        raise ValueError(f"Muc dich khong hop le: {purpose}")
+    for min_bits, rounds in KEYGEN_ROUNDS:
+        if bits >= min_bits:
+            return rounds
+    return DEFAULT_ROUNDS
+
+def trial_division(n: int):
+    """Sàng nhanh với các số nguyên tố nhỏ. Trả về True/False nếu đã kết luận, None nếu chưa."""
+    if n < 2:
+        return False
+    if n in SMALL_PRIMES:
+        return True
+    for p in SMALL_PRIMES:
+        if n % p == 0:
+            return False
+    return None
+
+def is_strong_probable_prime(n: int, a: int) -> bool:
+    """Kiểm tra n có là số giả nguyên tố mạnh cơ số a (một vòng Miller-Rabin)."""
+    d = n - 1
+    r = 0
+    while d % 2 == 0:
+        d //= 2
+        r += 1
+    x = pow(a, d, n)
+    if x == 1 or x == n - 1:
+        return True
+    for _ in range(r - 1):
+        x = pow(x, 2, n)
+        if x == n - 1:
+            return True
+    return False
+
+def miller_rabin(n: int, rounds: int) -> bool:
+    """Miller-Rabin với 'rounds' cơ số ngẫu nhiên (n lẻ, n > 31)."""
+    for _ in range(rounds):
+        a = secrets.randbelow(n - 3) + 2
+        if not is_strong_probable_prime(n, a):
+            return False
+    return True
+
+def jacobi(a: int, n: int) -> int:
+    """Ký hiệu Jacobi (a/n) với n lẻ dương."""
+    a %= n
+    result = 1
+    while a:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+def is_strong_lucas_probable_prime(n: int) -> bool:
+    """
+    Kiểm tra Lucas mạnh với tham số Selfridge (phương pháp A):
+    D là số đầu tiên trong 5, -7, 9, -11, ... có (D/n) = -1, P = 1, Q = (1 - D) / 4.
+    """
+    # Số chính phương không bao giờ tìm được D, loại trước
+    if math.isqrt(n) ** 2 == n:
+        return False
+    D = 5
+    while True:
+        j = jacobi(D, n)
+        if j == -1:
+            break
+        if j == 0 and abs(D) != n:
+            return False
+        D = -D - 2 if D > 0 else -D + 2
+    P = 1
+    Q = (1 - D) // 4
+
+    # n + 1 = d * 2^s
+    d = n + 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    # Tính U_d, V_d, Q^d bằng nhân đôi nhị phân từ bit cao xuống
+    inv2 = (n + 1) // 2
+    U, V, Qk = 1, P, Q % n
+    for bit in bin(d)[3:]:
+        # Nhân đôi: U_2k = U_k V_k, V_2k = V_k^2 - 2Q^k
+        U = (U * V) % n
+        V = (V * V - 2 * Qk) % n
+        Qk = (Qk * Qk) % n
+        if bit == "1":
+            # Cộng một: U_{k+1} = (P U + V) / 2, V_{k+1} = (D U + P V) / 2
+            U, V = ((P * U + V) * inv2) % n, ((D * U + P * V) * inv2) % n
+            Qk = (Qk * Q) % n
+
+    if U == 0 or V == 0:
+        return True
+    for _ in range(s - 1):
+        V = (V * V - 2 * Qk) % n
+        if V == 0:
+            return True
+        Qk = (Qk * Qk) % n
+    return False
+
+def baillie_psw(n: int) -> bool:
+    """
+    Kiểm tra Baillie-PSW: Miller-Rabin mạnh cơ số 2 + Lucas mạnh.
+    Tất định (chưa có phản ví dụ nào được biết), chỉ một lũy thừa và một dãy Lucas.
+    """
+    small = trial_division(n)
+    if small is not None:
+        return small
+    return is_strong_probable_prime(n, 2) and is_strong_lucas_probable_prime(n)
+
+def is_probable_prime(n: int, purpose: str = "adversarial", method: str = "mr") -> bool:
+    """
+    API kiểm tra nguyên tố chung.
+    method = "mr": Miller-Rabin với số vòng chọn theo độ dài bit và mục đích (purpose).
+    Mặc định purpose = "adversarial" (64 vòng) vì n có thể không rõ nguồn gốc;
+    khi sinh khóa với ứng viên ngẫu nhiên, nơi gọi truyền purpose="keygen".
+    method = "bpsw": Baillie-PSW (strong base-2 + strong Lucas).
+    """
+    if method == "bpsw":
+        return baillie_psw(n)
+    if method != "mr":
+        raise ValueError(f"Phuong phap khong hop le: {method}")
+    small = trial_division(n)
+    if small is not None:
+        return small
+    return miller_rabin(n, miller_rabin_rounds(n.bit_length(), purpose))
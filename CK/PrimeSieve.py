@@ -0,0 +1,96 @@
+import secrets
+
+# Số lượng số nguyên tố nhỏ dùng để sàng và số offset trong một cửa sổ sàng
+SIEVE_PRIME_COUNT = 4096
+DEFAULT_WINDOW = 4096
+
+def first_odd_primes(count: int) -> list:
+    """Sinh 'count' số nguyên tố lẻ đầu tiên bằng sàng Eratosthenes (bytearray)."""
+    limit = 64
+    while True:
+        flags = bytearray([1]) * limit
+        flags[0] = flags[1] = 0
+        for i in range(2, int(limit ** 0.5) + 1):
+            if flags[i]:
+                flags[i * i::i] = bytes(len(range(i * i, limit, i)))
+        primes = [i for i in range(3, limit, 2) if flags[i]]
+        if len(primes) >= count:
+            return primes[:count]
+        limit *= 2
+
+SIEVE_PRIMES = first_odd_primes(SIEVE_PRIME_COUNT)
+
+
+class SieveStats:
+    """Thống kê quá trình tìm số nguyên tố: bao nhiêu ứng viên bị sàng loại, bao nhiêu phải lũy thừa (Miller-Rabin)."""
+    def __init__(self):
+        self.windows = 0        # số cửa sổ đã sàng
+        self.candidates = 0     # tổng số ứng viên lẻ đã xét
+        self.sieved = 0         # số ứng viên bị loại bởi sàng (không tốn phép lũy thừa)
+        self.exponentiated = 0  # số ứng viên phải chạy Miller-Rabin
+        self.primes = 0         # số nguyên tố tìm được
+
+    def __str__(self):
+        return (f"{self.primes} prime, {self.windows} cua so, "
+                f"{self.candidates} ung vien: {self.sieved} bi sang loai, "
+                f"{self.exponentiated} chay Miller-Rabin")
+
+
+def sieve_window(offsets: list, primes: list, window: int) -> bytearray:
+    """
+    Sàng một cửa sổ gồm 'window' ứng viên start + 2*i.
+    offsets[j] là chỉ số i đầu tiên trong cửa sổ mà primes[j] chia hết ứng viên.
+    """
+    flags = bytearray([1]) * window
+    for i, p in zip(offsets, primes):
+        if i < window:
+            flags[i::p] = bytes((window - 1 - i) // p + 1)
+    return flags
+
+
+def find_prime(bits: int, is_prime, window: int = DEFAULT_WINDOW, stats: SieveStats = None,
+               min_value: int = None) -> int:
+    """
+    Tìm số nguyên tố xác suất có độ dài bits bằng tìm kiếm tăng dần có sàng.
+    Chọn một điểm bắt đầu ngẫu nhiên, sàng các cửa sổ offset với SIEVE_PRIMES
+    và chỉ chuyển các ứng viên sống sót cho hàm kiểm tra is_prime (Miller-Rabin).
+    min_value: cận dưới của số nguyên tố (mặc định 2^(bits-1), tức chỉ đặt bit cao nhất).
+    """
+    if stats is None:
+        stats = SieveStats()
+    # Chỉ sàng với p < 2^(bits-1) để không loại nhầm chính số nguyên tố p
+    primes = [p for p in SIEVE_PRIMES if p < (1 << (bits - 1))]
+    # Nghịch đảo của 2 mod p, dùng để giải start + 2*i = 0 (mod p)
+    halves = [(p + 1) // 2 for p in primes]
+    limit = 1 << bits
+    low = 1 << (bits - 1) if min_value is None else min_value
+    if not (1 << (bits - 1)) <= low < limit:
+        raise ValueError("min_value phai nam trong [2^(bits-1), 2^bits)")
+
+    while True:
+        # Điểm bắt đầu ngẫu nhiên: lẻ và nằm trong [low, 2^bits)
+        start = (low + secrets.randbelow(limit - low)) | 1
+        # Phần dư chỉ tính một lần với số lớn, sau đó cập nhật tăng dần bằng số nhỏ
+        offsets = [((p - start % p) * h) % p for p, h in zip(primes, halves)]
+        base = start
+        while base < limit:
+            flags = sieve_window(offsets, primes, window)
+            stats.windows += 1
+            i = flags.find(1)
+            while i != -1:
+                candidate = base + 2 * i
+                if candidate >= limit:
+                    break
+                stats.exponentiated += 1
+                if is_prime(candidate):
+                    stats.candidates += i + 1
+                    stats.sieved = stats.candidates - stats.exponentiated
+                    stats.primes += 1
+                    return candidate
+                i = flags.find(1, i + 1)
+            stats.candidates += window
+            stats.sieved = stats.candidates - stats.exponentiated
+            # Dịch sang cửa sổ kế tiếp: offset mới = (offset - window) mod p
+            offsets = [(i - window) % p for i, p in zip(offsets, primes)]
+            base += 2 * window
+        # Vượt quá độ dài bits: chọn lại điểm bắt đầu
@@ -2,45 +2,24 @@ import secrets
 import math
 import sys
 import time
+import os
+import multiprocessing as mp
+from PrimeSieve import find_prime, SieveStats
+from Primality import miller_rabin_rounds, miller_rabin, trial_division
+from Trace import channel, enable_demo_tracing
+
+trace = channel("rsa")
 
 def is_probable_prime_miller_rabin(n: int, rounds: int = 64) -> bool:
     """
     Kiểm tra tính nguyên tố xác suất bằng thuật toán Miller-Rabin.
+    Mặc định 64 vòng, an toàn cả với đầu vào do đối thủ chọn; khi sinh khóa,
+    nơi gọi truyền miller_rabin_rounds(bits, "keygen").
     """
-    if n < 2:
-        return False
-    # Sàng lọc nhanh với các số nguyên tố nhỏ
-    small_primes = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31]
-    if n in small_primes:
-        return True
-    for p in small_primes:
-        if n % p == 0:
-            return False
-
-    # Phân tích n - 1 = 2^r * d
-    d = n - 1
-    r = 0
-    while d % 2 == 0:
-        d //= 2
-        r += 1
-
-    # Thực hiện kiểm tra Miller-Rabin (rounds lần)
-    for _ in range(rounds):
-        # Chọn cơ số ngẫu nhiên 'a'
-        a = secrets.randbelow(n - 3) + 2  
-        x = pow(a, d, n)
-        if x == 1 or x == n - 1:
-            continue
-            
-        # Kiểm tra điều kiện x^(2^j * d) = -1 mod n
-        for _ in range(r - 1):
-            x = pow(x, 2, n)
-            if x == n - 1:
-                break
-        else:
-            # Nếu vòng lặp không bị 'break', n là hợp số
-            return False
-    return True
+    small = trial_division(n)
+    if small is not None:
+        return small
+    return miller_rabin(n, rounds)
 
 def extended_gcd(a: int, b: int) -> tuple:
     """
@@ -64,6 +43,17 @@ def modular_inverse(a: int, m: int) -> int:
     return x % m
 
 
+def integer_root(n: int, k: int) -> int:
+    """Căn bậc k nguyên: số x lớn nhất với x^k <= n (Newton trên số nguyên)."""
+    if n < 2:
+        return n
+    x = 1 << ((n.bit_length() + k - 1) // k)
+    while True:
+        y = ((k - 1) * x + n // x ** (k - 1)) // k
+        if y >= x:
+            return x
+        x = y
+
 def random_odd_with_msb(bits: int) -> int:
     """Sinh số ngẫu nhiên lẻ có bit cao nhất được đặt (đảm bảo độ dài)."""
     n = secrets.randbits(bits)
@@ -71,14 +61,64 @@ def random_odd_with_msb(bits: int) -> int:
     n |= 1                  # Đặt bit thấp nhất (Least Significant Bit)
     return n
 
-def generate_strong_prime(bits: int) -> int:
-    """Tìm số nguyên tố xác suất có độ dài bits."""
-    print(f"\r  Dang tim prime {bits}-bit...", end='')
-    sys.stdout.flush()
-    while True:
-        candidate = random_odd_with_msb(bits)
-        if is_probable_prime_miller_rabin(candidate):
-            return candidate
+def generate_strong_prime(bits: int, stats: SieveStats = None, min_value: int = None) -> int:
+    """Tìm số nguyên tố xác suất có độ dài bits (tìm kiếm tăng dần có sàng), không nhỏ hơn min_value."""
+    trace.info("  Dang tim prime {}-bit...", bits)
+    rounds = miller_rabin_rounds(bits, "keygen")
+    return find_prime(bits, lambda n: is_probable_prime_miller_rabin(n, rounds), stats=stats, min_value=min_value)
+
+def prime_search_worker(bits: int, results, stop, min_value: int = None):
+    """Tiến trình con: tìm số nguyên tố liên tục và gửi (prime, stats) về hàng đợi cho đến khi bị dừng."""
+    rounds = miller_rabin_rounds(bits, "keygen")
+    while not stop.is_set():
+        stats = SieveStats()
+        candidate = find_prime(bits, lambda n: is_probable_prime_miller_rabin(n, rounds), stats=stats,
+                               min_value=min_value)
+        results.put((candidate, stats))
+
+def generate_primes_parallel(bits: int, count: int = 2, workers: int = None, stats: SieveStats = None,
+                             min_value: int = None) -> list:
+    """
+    Tìm 'count' số nguyên tố phân biệt bằng nhiều tiến trình cùng lúc.
+    Lấy các số nguyên tố đến sớm nhất, sau đó hủy ngay các tiến trình còn lại.
+    """
+    if workers is None:
+        workers = os.cpu_count()
+    if workers <= 1:
+        # Không song song: quay về đường tuần tự
+        primes = []
+        while len(primes) < count:
+            candidate = generate_strong_prime(bits, stats, min_value)
+            if candidate not in primes:
+                primes.append(candidate)
+        return primes
+
+    results = mp.Queue()
+    stop = mp.Event()
+    procs = [mp.Process(target=prime_search_worker, args=(bits, results, stop, min_value), daemon=True)
+             for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+    primes = []
+    try:
+        while len(primes) < count:
+            candidate, worker_stats = results.get()
+            if stats is not None:
+                stats.windows += worker_stats.windows
+                stats.candidates += worker_stats.candidates
+                stats.sieved += worker_stats.sieved
+                stats.exponentiated += worker_stats.exponentiated
+                stats.primes += worker_stats.primes
+            if candidate not in primes:
+                primes.append(candidate)
+    finally:
+        # Hủy các tiến trình còn đang tìm kiếm
+        stop.set()
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.join()
+    return primes
 
 def bytes_to_integer(b: bytes) -> int:
     """Chuyển đổi bytes sang integer (Big Endian)."""
@@ -92,51 +132,60 @@ def integer_to_bytes(x: int, length: int = None) -> bytes:
         b = b"\x00" * (length - blen) + b
     return b
 
-def generate_rsa_keypair(prime_bits: int = 2048):
+def generate_rsa_keypair(prime_bits: int = 2048, workers: int = 1):
     """
     Sinh cặp khóa RSA: n = p*q (4096-bit) với p, q là nguyên tố 2048-bit.
+    workers > 1 (hoặc None = tất cả CPU): tìm p, q song song trên nhiều tiến trình.
     """
     start_time = time.time()
     # Khóa công khai mặc định
     e = 65537 
+    stats = SieveStats()
     
     # 1. Sinh hai số nguyên tố lớn p và q
-    print(f"\nDang sinh p ({prime_bits}-bit)...")
-    p = generate_strong_prime(prime_bits)
-    print(f"\r p da duoc sinh. ({prime_bits}-bit).")
-    print(f"\r p = {p}.")
-    print(f"Dang sinh q ({prime_bits}-bit)...")
-    while True:
-        q = generate_strong_prime(prime_bits)
-        if q != p:
-            break
-    print(f"\r q da duoc sinh. ({prime_bits}-bit).")
-    print(f"\r q = {q}.")
+    if workers != 1:
+        trace.info("\nDang sinh p, q ({}-bit) song song tren {} tien trinh...", prime_bits, workers or os.cpu_count())
+        p, q = generate_primes_parallel(prime_bits, 2, workers, stats)
+        trace(" p = {}.", p)
+        trace(" q = {}.", q)
+    else:
+        trace.info("\nDang sinh p ({}-bit)...", prime_bits)
+        p = generate_strong_prime(prime_bits, stats)
+        trace.info(" p da duoc sinh. ({}-bit).", prime_bits)
+        trace(" p = {}.", p)
+        trace.info("Dang sinh q ({}-bit)...", prime_bits)
+        while True:
+            q = generate_strong_prime(prime_bits, stats)
+            if q != p:
+                break
+        trace.info(" q da duoc sinh. ({}-bit).", prime_bits)
+        trace(" q = {}.", q)
+    trace.info(" Sang loc: {}", stats)
     
     # 2. Tính n và phi(n)
     n = p * q
-    print(f"\n n = {n}")
+    trace("\n n = {}", n)
     phi = (p - 1) * (q - 1)
-    print(f"\n phi = {phi}")
+    trace("\n phi = {}", phi)
 
     # 3. Tính khóa bí mật d
     if math.gcd(e, phi) != 1:
          # Điều này hiếm khi xảy ra khi e=65537, nhưng là kiểm tra an toàn
-         print("WARNING: gcd(e, phi) != 1. Tai tao khoa...")
-         return generate_rsa_keypair(prime_bits)
+         trace.info("WARNING: gcd(e, phi) != 1. Tai tao khoa...")
+         return generate_rsa_keypair(prime_bits, workers)
 
     d = modular_inverse(e, phi)
-    print(f"\n d = {d}")
+    trace("\n d = {}", d)
     # 4. Tính các tham số CRT để tăng tốc giải mã
     # dp = d mod (p-1)
     # dq = d mod (q-1)
     # qinv = q^-1 mod p (sử dụng p thay vì n)
     dp = d % (p - 1)
-    print(f"\n dp = {dp}")
+    trace("\n dp = {}", dp)
     dq = d % (q - 1)
-    print(f"\n dq = {dq}")
+    trace("\n dq = {}", dq)
     qinv = modular_inverse(q, p)
-    print(f"\n qinv = {qinv}")
+    trace("\n qinv = {}", qinv)
 
     public_key = {"n": n, "e": e}
     private_key = {
@@ -146,7 +195,66 @@ def generate_rsa_keypair(prime_bits: int = 2048):
     }
     
     elapsed = time.time() - start_time
-    print(f"Hoan tat sinh khoa 4096-bit. Thoi gian: {elapsed:.2f}s.")
+    trace.info("Hoan tat sinh khoa 4096-bit. Thoi gian: {:.2f}s.", elapsed)
+    return public_key, private_key
+
+def generate_multiprime_rsa_keypair(bits: int = 4096, num_primes: int = 3, workers: int = 1):
+    """
+    Sinh cặp khóa RSA nhiều số nguyên tố (RFC 8017): n = r_1 * r_2 * ... * r_k.
+    r_1 = p, r_2 = q dùng dp, dq, qinv như khóa hai số nguyên tố; mỗi r_i (i >= 3)
+    có thêm bộ (r_i, d_i = d mod (r_i - 1), t_i = (r_1 * ... * r_{i-1})^-1 mod r_i).
+    """
+    if num_primes < 2:
+        raise ValueError("Can it nhat 2 so nguyen to")
+    start_time = time.time()
+    e = 65537
+    stats = SieveStats()
+
+    # 1. Sinh k số nguyên tố phân biệt, tổng độ dài bằng bits.
+    # Mỗi số nguyên tố s bit được chọn >= 2^(s - 1/k) (không chỉ đặt bit cao nhất),
+    # nên tích >= 2^(bits - 1): n luôn có đúng bits bit.
+    sizes = [bits // num_primes] * num_primes
+    sizes[0] += bits - sum(sizes)
+    trace.info("\nDang sinh {} so nguyen to {}...", num_primes, sizes)
+    primes = []
+    for size in sorted(set(sizes)):
+        count = sizes.count(size)
+        low = integer_root((1 << (num_primes * size - 1)) - 1, num_primes) + 1
+        for r in generate_primes_parallel(size, count, workers, stats, low):
+            while r in primes:
+                r = generate_strong_prime(size, stats, low)
+            primes.append(r)
+    trace.info(" Sang loc: {}", stats)
+
+    # 2. Tính n, phi(n) và d
+    n = 1
+    phi = 1
+    for r in primes:
+        n *= r
+        phi *= r - 1
+    if math.gcd(e, phi) != 1:
+        trace.info("WARNING: gcd(e, phi) != 1. Tai tao khoa...")
+        return generate_multiprime_rsa_keypair(bits, num_primes, workers)
+    d = modular_inverse(e, phi)
+
+    # 3. Tham số CRT: (p, q, dp, dq, qinv) và các bộ (r_i, d_i, t_i)
+    p, q = primes[0], primes[1]
+    private_key = {
+        "n": n, "d": d,
+        "p": p, "q": q,
+        "dp": d % (p - 1), "dq": d % (q - 1), "qinv": modular_inverse(q, p)
+    }
+    if num_primes > 2:
+        other_primes = []
+        R = p * q
+        for r in primes[2:]:
+            other_primes.append({"r": r, "d": d % (r - 1), "t": modular_inverse(R, r)})
+            R *= r
+        private_key["other_primes"] = other_primes
+    public_key = {"n": n, "e": e}
+
+    elapsed = time.time() - start_time
+    trace.info("Hoan tat sinh khoa {}-bit ({} so nguyen to). Thoi gian: {:.2f}s.", n.bit_length(), num_primes, elapsed)
     return public_key, private_key
 
 def rsa_encrypt_integer(message_int: int, public_key: dict) -> int:
@@ -155,7 +263,7 @@ def rsa_encrypt_integer(message_int: int, public_key: dict) -> int:
     if not (0 <= message_int < n):
         raise ValueError("So nguyen thong diep vuot qua gioi han modulus (n)")
     c = pow(message_int, e, n)
-    print(f"\n c = {c}")
+    trace("\n c = {}", c)
     return c
 
 def rsa_decrypt_integer_crt(cipher_int: int, private_key: dict) -> int:
@@ -172,24 +280,84 @@ def rsa_decrypt_integer_crt(cipher_int: int, private_key: dict) -> int:
     # 1. Tính toán modulo p và q
     # m1 = c^dp mod p
     m1 = pow(cipher_int, dp, p)
-    print(f"\n m1 = {m1}")
+    trace("\n m1 = {}", m1)
     # m2 = c^dq mod q
     m2 = pow(cipher_int, dq, q)
-    print(f"\n m2 = {m2}")
+    trace("\n m2 = {}", m2)
     # 2. Áp dụng CRT
     # h = qinv * (m1 - m2) mod p
     h = (qinv * (m1 - m2)) % p
-    print(f"\n h = {h}")
+    trace("\n h = {}", h)
     # m = m2 + h * q
     m = m2 + h * q
-    print(f"\n m = {m}")
+    # 3. Khóa nhiều số nguyên tố: ghép thêm từng r_i theo Garner (RFC 8017, 5.1.2)
+    R = p * q
+    for info in private_key.get("other_primes", ()):
+        r, d_i, t_i = info["r"], info["d"], info["t"]
+        m_i = pow(cipher_int, d_i, r)
+        trace("\n m_i = {}", m_i)
+        h = ((m_i - m) * t_i) % r
+        m = m + R * h
+        R *= r
+    trace("\n m = {}", m)
     return m
 
+def rsa_crt_params(private_key: dict) -> tuple:
+    """Gom các tham số CRT của khóa bí mật thành tuple (dùng cho rsa_private_crt)."""
+    others = tuple((info["r"], info["d"], info["t"]) for info in private_key.get("other_primes", ()))
+    return (private_key["n"], private_key["p"], private_key["q"],
+            private_key["dp"], private_key["dq"], private_key["qinv"], others)
+
+def rsa_private_crt(value: int, params: tuple) -> int:
+    """Phép toán khóa bí mật m = c^d mod n bằng CRT tổng quát (Garner), không in kết quả."""
+    n, p, q, dp, dq, qinv, others = params
+    if not (0 <= value < n):
+        raise ValueError("So nguyen ban ma vuot qua gioi han modulus (n)")
+    m1 = pow(value, dp, p)
+    m2 = pow(value, dq, q)
+    m = m2 + ((qinv * (m1 - m2)) % p) * q
+    R = p * q
+    for r, d_i, t_i in others:
+        m_i = pow(value, d_i, r)
+        m += R * (((m_i - m) * t_i) % r)
+        R *= r
+    return m
+
+# Khóa bí mật của tiến trình con trong rsa_private_batch (chỉ gửi một lần cho mỗi worker)
+_batch_key = None
+
+def rsa_private_batch_init(private_key: dict):
+    """Khởi tạo worker: lưu các tham số CRT của khóa bí mật."""
+    global _batch_key
+    _batch_key = rsa_crt_params(private_key)
+
+def rsa_private_batch_one(value: int) -> int:
+    """Một phép toán khóa bí mật (CRT) không in kết quả, dùng khóa đã lưu trong worker."""
+    return rsa_private_crt(value, _batch_key)
+
+def rsa_private_batch(values, private_key: dict, workers: int = None, chunksize: int = 16):
+    """
+    Thực hiện phép toán khóa bí mật (giải mã / ký, CRT) cho nhiều giá trị.
+    Phân chia cho một pool tiến trình, khóa chỉ gửi một lần cho mỗi worker,
+    kết quả được trả về dần theo đúng thứ tự đầu vào. Không in gì ra màn hình.
+    """
+    if workers is None:
+        workers = os.cpu_count()
+    if workers <= 1:
+        # Tham số giữ cục bộ: nhiều batch với các khóa khác nhau có thể chạy xen kẽ
+        params = rsa_crt_params(private_key)
+        for value in values:
+            yield rsa_private_crt(value, params)
+        return
+    with mp.Pool(workers, initializer=rsa_private_batch_init, initargs=(private_key,)) as pool:
+        yield from pool.imap(rsa_private_batch_one, values, chunksize=chunksize)
+
 if __name__ == "__main__":
+    enable_demo_tracing()
     print("--- DEMO THUẬT TOÁN RSA 4096-BIT ---")
     
     # Sinh khóa (phần tốn thời gian nhất)
-    pub, priv = generate_rsa_keypair(prime_bits=2048)
+    pub, priv = generate_rsa_keypair(prime_bits=2048, workers=None)
     
     print("\nTHÔNG SỐ KHÓA:")
     print(f"  Do dai khóa (n): {pub['n'].bit_length()} bits")
@@ -0,0 +1,229 @@
+import os
+import sys
+import json
+import time
+import secrets
+import multiprocessing as mp
+from RSA import generate_rsa_keypair
+
+# Thư mục lưu các cặp khóa đã sinh sẵn (có thể đổi bằng biến môi trường CK_RSA_POOL_DIR)
+DEFAULT_POOL_DIR = os.environ.get(
+    "CK_RSA_POOL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "rsa_pool"))
+DEFAULT_DEPTH = 4
+KEY_FIELDS = ("n", "e", "d", "p", "q", "dp", "dq", "qinv")
+
+def save_keypair(path: str, public_key: dict, private_key: dict):
+    """Ghi cặp khóa (kèm dp, dq, qinv) ra file JSON, ghi nguyên tử qua file tạm."""
+    record = {"e": public_key["e"]}
+    record.update({k: private_key[k] for k in KEY_FIELDS if k in private_key})
+    # Tên file tạm chứa pid của tiến trình ghi, để cleanup_stale_files biết file nào bị bỏ lại
+    tmp = path + f".{os.getpid()}.tmp"
+    # Khóa bí mật: file tạm được tạo ngay với quyền 0600 (chỉ chủ sở hữu đọc được), không qua umask
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        json.dump({k: hex(v) for k, v in record.items()}, f)
+    os.replace(tmp, path)
+
+def load_keypair(path: str):
+    """Đọc cặp khóa từ file JSON, trả về (public_key, private_key) như generate_rsa_keypair."""
+    with open(path) as f:
+        record = {k: int(v, 16) for k, v in json.load(f).items()}
+    public_key = {"n": record["n"], "e": record["e"]}
+    private_key = {k: record[k] for k in KEY_FIELDS if k != "e"}
+    return public_key, private_key
+
+def pool_files(directory: str, bits: int) -> list:
+    """Danh sách file khóa sẵn sàng cho độ dài modulus bits."""
+    prefix = f"rsa{bits}-"
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return sorted(os.path.join(directory, name) for name in names
+                  if name.startswith(prefix) and name.endswith(".json"))
+
+def pid_alive(pid: int) -> bool:
+    """Tiến trình pid còn chạy hay không (PermissionError: còn chạy nhưng thuộc người dùng khác)."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def cleanup_stale_files(directory: str):
+    """
+    Xóa các file chứa khóa bí mật bị bỏ lại khi một tiến trình chết giữa chừng:
+    file tạm "*.<pid>.tmp" của save_keypair và file "*.<pid>.claimed" của take(),
+    khi tiến trình pid không còn chạy (file ".tmp" không có pid là của phiên bản cũ, luôn bị xóa).
+    """
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in names:
+        if not name.startswith("rsa") or not name.endswith((".tmp", ".claimed")):
+            continue
+        pid = name.rsplit(".", 2)[-2]
+        if pid.isdigit() and pid_alive(int(pid)):
+            continue
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+def refill_worker(directory: str, bits: int, depth: int, interval: float, generated, last_generated, stop):
+    """Tiến trình nền: sinh khóa cho đến khi pool đủ 'depth' khóa, cách nhau ít nhất 'interval' giây."""
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    # Tiến trình nền không in các tham số khóa ra màn hình
+    with open(os.devnull, "w") as devnull:
+        sys.stdout = devnull
+        while not stop.is_set():
+            if len(pool_files(directory, bits)) >= depth:
+                stop.wait(0.5)
+                continue
+            pub, priv = generate_rsa_keypair(prime_bits=bits // 2)
+            path = os.path.join(directory, f"rsa{bits}-{time.time_ns()}-{secrets.token_hex(4)}.json")
+            save_keypair(path, pub, priv)
+            with generated.get_lock():
+                generated.value += 1
+            last_generated.value = time.time()
+            stop.wait(interval)
+
+
+class RSAKeyPool:
+    """
+    Pool các cặp khóa RSA sinh sẵn trong tiến trình nền và lưu trên đĩa.
+    get() lấy một khóa trong vài mili giây, chỉ chờ khi pool rỗng.
+    """
+    def __init__(self, bits: int = 4096, depth: int = DEFAULT_DEPTH, directory: str = DEFAULT_POOL_DIR,
+                 interval: float = 0.0):
+        self.bits = bits
+        self.depth = depth
+        self.directory = directory
+        self.interval = interval      # thời gian nghỉ tối thiểu giữa hai lần sinh khóa (giới hạn tốc độ nạp)
+        self.hits = 0
+        self.misses = 0
+        self.started_at = time.time()
+        self.generated = mp.Value("i", 0)
+        self.last_generated = mp.Value("d", 0.0)
+        self.stop_event = mp.Event()
+        self.process = None
+
+    def start(self):
+        """Khởi động tiến trình nạp khóa nền (nếu chưa chạy)."""
+        if self.process is not None and self.process.is_alive():
+            return
+        cleanup_stale_files(self.directory)
+        self.stop_event.clear()
+        self.started_at = time.time()
+        self.process = mp.Process(
+            target=refill_worker,
+            args=(self.directory, self.bits, self.depth, self.interval,
+                  self.generated, self.last_generated, self.stop_event),
+            daemon=True)
+        self.process.start()
+
+    def stop(self):
+        """Dừng tiến trình nền. Các khóa đã lưu trên đĩa vẫn được giữ cho lần chạy sau."""
+        if self.process is None:
+            return
+        self.stop_event.set()
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.process = None
+
+    def take(self):
+        """Lấy một khóa khỏi pool (chiếm file bằng rename nguyên tử). Trả về None nếu pool rỗng."""
+        for path in pool_files(self.directory, self.bits):
+            claimed = path + f".{os.getpid()}.claimed"
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                # Tiến trình khác đã lấy khóa này
+                continue
+            try:
+                keypair = load_keypair(claimed)
+            except (OSError, ValueError, KeyError):
+                # File hỏng: bỏ qua (và xóa), thử khóa kế tiếp
+                continue
+            finally:
+                os.remove(claimed)
+            return keypair
+        return None
+
+    def get(self):
+        """Lấy một cặp khóa (public_key, private_key). Chỉ chặn khi pool rỗng."""
+        keypair = self.take()
+        if keypair is not None:
+            self.hits += 1
+            return keypair
+        self.misses += 1
+        # Pool rỗng: chờ tiến trình nền, hoặc tự sinh nếu tiến trình nền không chạy
+        while self.process is not None and self.process.is_alive():
+            keypair = self.take()
+            if keypair is not None:
+                return keypair
+            time.sleep(0.05)
+        return generate_rsa_keypair(prime_bits=self.bits // 2)
+
+    def stats(self) -> dict:
+        """Trạng thái pool: số khóa sẵn sàng, tốc độ nạp, số lần hit/miss."""
+        elapsed = time.time() - self.started_at
+        generated = self.generated.value
+        return {
+            "bits": self.bits,
+            "ready": len(pool_files(self.directory, self.bits)),
+            "depth": self.depth,
+            "generated": generated,
+            "refill_rate_per_min": generated * 60 / elapsed if elapsed > 0 else 0.0,
+            "last_generated": self.last_generated.value,
+            "hits": self.hits,
+            "misses": self.misses,
+            "running": self.process is not None and self.process.is_alive(),
+        }
+
+_pools = {}
+
+def get_rsa_keypair(bits: int = 4096, depth: int = DEFAULT_DEPTH):
+    """Lấy cặp khóa RSA 'bits'-bit từ pool mặc định (khởi động tiến trình nền ở lần gọi đầu)."""
+    pool = _pools.get(bits)
+    if pool is None:
+        pool = _pools[bits] = RSAKeyPool(bits, depth)
+    elif pool.depth != depth:
+        # Tiến trình nền nhận depth lúc khởi động: dừng rồi chạy lại với depth mới
+        pool.stop()
+        pool.depth = depth
+    pool.start()
+    return pool.get()
+
+def pool_stats(bits: int = 4096) -> dict:
+    """Trạng thái của pool mặc định cho độ dài bits."""
+    pool = _pools.get(bits)
+    if pool is None:
+        pool = RSAKeyPool(bits)
+    return pool.stats()
+
+if __name__ == "__main__":
+    print("--- RSA KEY POOL ---")
+    pool = RSAKeyPool(bits=4096, depth=DEFAULT_DEPTH)
+    pool.start()
+    print(f"Dang nap pool tai: {pool.directory}")
+    try:
+        while True:
+            s = pool.stats()
+            sys.stdout.write(f"\r  ready={s['ready']}/{s['depth']} generated={s['generated']} "
+                             f"rate={s['refill_rate_per_min']:.2f}/min")
+            sys.stdout.flush()
+            if s["ready"] >= s["depth"]:
+                break
+            time.sleep(1)
+    finally:
+        pool.stop()
+    start = time.time()
+    pub, priv = pool.get()
+    print(f"\nLay khoa tu pool: {(time.time() - start) * 1000:.2f} ms, n = {pub['n'].bit_length()} bits")
+    print(pool.stats())
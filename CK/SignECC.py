@@ -1,20 +1,22 @@
 # demo_ecdsa.py
 
-from ECC import generate_keypair, sign, verify, print_parameters
+import sys
+from ECC import generate_keypair, sign, verify, print_parameters, get_curve, SECP192R1
+from Trace import enable_demo_tracing
 
-def demo_ecc_digital_signature():
+def demo_ecc_digital_signature(curve=SECP192R1):
     """Minh họa quy trình ký và xác minh chữ ký số ECDSA (Alice -> Bob)."""
     
     # --- 1. ALICE (Người Ký) ---
-    print("Alice: Dang tao cap khoa ECC 192-bit...")
-    d, Q = generate_keypair()
-    print_parameters(d, Q)
+    print(f"Alice: Dang tao cap khoa ECC {curve.n.bit_length()}-bit ({curve.name})...")
+    d, Q = generate_keypair(curve)
+    print_parameters(d, Q, curve)
 
     original_message = b"Day la thong diep can ky"
     print(f"\nAlice: Thong diep goc = {original_message}")
 
     # Alice ký thông điệp
-    r, s = sign(original_message, d)
+    r, s = sign(original_message, d, curve)
     print(f"Alice: Tao chu ky so (r, s) = ({r}, {s})")
     print("Alice: Gui chu ky va thong diep cho Bob")
 
@@ -23,7 +25,7 @@ def demo_ecc_digital_signature():
     bob_received_signature = (r, s)
 
     print("\nBob: Tien hanh xac minh chu ky bang khoa CONG KHAI...")
-    valid = verify(bob_received_message, bob_received_signature[0], bob_received_signature[1], Q)
+    valid = verify(bob_received_message, bob_received_signature[0], bob_received_signature[1], Q, curve)
 
     if valid:
         print("Bob: Chu ky hop le = True (Xac minh THANH CONG).")
@@ -31,4 +33,6 @@ def demo_ecc_digital_signature():
         print("Bob: Chu ky hop le = False (Xac minh THAT BAI).")
 
 if __name__ == "__main__":
-    demo_ecc_digital_signature()
+    enable_demo_tracing()
+    # Tên đường cong tùy chọn: python SignECC.py secp256k1 (mặc định secp192r1)
+    demo_ecc_digital_signature(get_curve(sys.argv[1]) if len(sys.argv) > 1 else SECP192R1)
@@ -2,6 +2,9 @@ import math
 import hashlib
 import secrets
 from Elgamal import generate_elgamal_keypair as generate_keys, bytes_to_integer as b2i
+from Trace import channel, enable_demo_tracing
+
+trace = channel("elgamal")
 
 def elgamal_sign_message(message: bytes, private_key: tuple) -> tuple:
     """Thực hiện ký thông điệp bằng khóa bí mật ElGamal."""
@@ -28,7 +31,7 @@ def elgamal_sign_message(message: bytes, private_key: tuple) -> tuple:
     # 5. Tính s (Thành phần thứ hai của chữ ký)
     # s = k_inv * (m - x*r) mod (p - 1)
     s = (k_inv * (m - x * r)) % (p - 1)
-    print(f"\n r = {r} \n k = {k} \n k^-1 = {k_inv} \n s = {s}")
+    trace("\n r = {} \n k = {} \n k^-1 = {} \n s = {}", r, k, k_inv, s)
     return (r, s)
 
 def elgamal_verify_signature(message: bytes, signature: tuple, public_key: tuple) -> bool:
@@ -54,7 +57,7 @@ def elgamal_verify_signature(message: bytes, signature: tuple, public_key: tuple
     r_s = pow(r, s, p)
     right_side = (y_r * r_s) % p
 
-    print(f"\nleft = {left_side} \n y_r = {y_r} \n r_s = {r_s} \n right = {right_side}")
+    trace("\nleft = {} \n y_r = {} \n r_s = {} \n right = {}", left_side, y_r, r_s, right_side)
     # 5. So sánh
     return left_side == right_side
 
@@ -78,4 +81,5 @@ def demo_elgamal_digital_signature():
     print("Bob: Chu ky hop le =", is_valid)
 
 if __name__ == "__main__":
+    enable_demo_tracing()
     demo_elgamal_digital_signature()
\ No newline at end of file
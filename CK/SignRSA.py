@@ -1,11 +1,12 @@
 import hashlib
+from RSAKeyPool import get_rsa_keypair as generate_keys
 from RSA import (
-    generate_rsa_keypair as generate_keys,
     rsa_encrypt_integer as rsa_verify,
     rsa_decrypt_integer_crt as rsa_sign,
     bytes_to_integer as b2i,
     integer_to_bytes as i2b
 )
+from Trace import enable_demo_tracing
 
 def demo_rsa_digital_signature():
     """Minh họa quy trình ký và xác minh chữ ký số RSA."""
@@ -53,4 +54,5 @@ def demo_rsa_digital_signature():
     print("Bob: CHU KY HOP LE (Xac thuc thanh cong) =", is_valid)
 
 if __name__ == "__main__":
+    enable_demo_tracing()
     demo_rsa_digital_signature()
\ No newline at end of file
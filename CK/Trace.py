@@ -0,0 +1,75 @@
+import os
+import sys
+
+# Các mức trace: OFF không in gì (mặc định), INFO in tiến trình, DEBUG in cả các giá trị trung gian
+OFF, INFO, DEBUG = 0, 1, 2
+LEVELS = {"off": OFF, "info": INFO, "debug": DEBUG}
+
+# Cấu hình hiện tại: tên kênh -> mức, "*" là mức mặc định cho mọi kênh
+_config = {"*": OFF}
+_channels = {}
+
+
+class Channel:
+    """
+    Một kênh trace có tên (ví dụ "rsa", "ecc").
+    Các tham số chỉ được định dạng (str.format) khi kênh đang bật ở mức tương ứng,
+    nên khi tắt, số nguyên lớn không bao giờ bị chuyển sang chuỗi thập phân.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.level = OFF
+
+    def enabled(self, level: int = DEBUG) -> bool:
+        return self.level >= level
+
+    def emit(self, fmt: str, args: tuple):
+        sys.stdout.write((fmt.format(*args) if args else fmt) + "\n")
+
+    def debug(self, fmt: str, *args):
+        if self.level >= DEBUG:
+            self.emit(fmt, args)
+
+    def info(self, fmt: str, *args):
+        if self.level >= INFO:
+            self.emit(fmt, args)
+
+    __call__ = debug
+
+
+def parse_level(text: str) -> int:
+    try:
+        return LEVELS[text.strip().lower()]
+    except KeyError:
+        raise ValueError(f"Muc trace khong hop le: {text}") from None
+
+def configure(spec: str):
+    """
+    Cấu hình trace từ chuỗi dạng "rsa=debug,ecc=info" hoặc "*" (bật DEBUG cho mọi kênh).
+    Tên kênh không kèm mức nghĩa là DEBUG. Chuỗi rỗng tắt toàn bộ.
+    """
+    _config.clear()
+    _config["*"] = OFF
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, level = item.partition("=")
+        _config[name.strip()] = parse_level(level) if level else DEBUG
+    for ch in _channels.values():
+        ch.level = _config.get(ch.name, _config["*"])
+
+def channel(name: str) -> Channel:
+    """Lấy (hoặc tạo) kênh trace theo tên."""
+    ch = _channels.get(name)
+    if ch is None:
+        ch = _channels[name] = Channel(name)
+        ch.level = _config.get(name, _config["*"])
+    return ch
+
+def enable_demo_tracing():
+    """Các file demo bật toàn bộ trace để in các bước tính toán, trừ khi CK_TRACE đã được đặt."""
+    configure(os.environ.get("CK_TRACE", "*"))
+
+# Cấu hình ban đầu lấy từ biến môi trường CK_TRACE (mặc định: tắt)
+configure(os.environ.get("CK_TRACE", ""))
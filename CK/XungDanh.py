@@ -1,17 +1,18 @@
 # demo_rsa_challenge_response_verbose.py
 import os
 import hashlib
+from RSAKeyPool import get_rsa_keypair
 from RSA import (
-    generate_rsa_keypair,
     rsa_encrypt_integer,
     rsa_decrypt_integer_crt,
     bytes_to_integer,
     integer_to_bytes
 )
+from Trace import enable_demo_tracing
 
 def demo_rsa_challenge_response():
     print("=== Bước 1: Alice tạo cặp khóa RSA 4096-bit ===")
-    pub, priv = generate_rsa_keypair(prime_bits=2048)
+    pub, priv = get_rsa_keypair(4096)
     
     print("\nKhóa công khai (Alice):")
     print(f"  n (modulus, 64 ký tự đầu): {hex(pub['n'])[2:66]}...")
@@ -59,4 +60,5 @@ def demo_rsa_challenge_response():
         print("\nKết quả: Xác thực THẤT BẠI.")
 
 if __name__ == "__main__":
+    enable_demo_tracing()
     demo_rsa_challenge_response()